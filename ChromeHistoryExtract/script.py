@@ -2,26 +2,68 @@
 """Extraction de l'historique Chrome/Chromium directement depuis une image disque (dissect.target)."""
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import logging
 import os
 import shutil
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterator, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - repli sur la bibliothèque standard
+    orjson = None  # type: ignore
+
+try:
+    import apsw
+except ImportError:  # pragma: no cover - lecture directe indisponible, copie locale
+    apsw = None  # type: ignore
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - repli sur hashlib
+    xxhash = None  # type: ignore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - conversion scalaire uniquement
+    np = None  # type: ignore
 
 from dissect.target import Target
 from dissect.target.exceptions import FilesystemError, TargetError
 from dissect.target.helpers.fsutil import TargetPath
 
+_VFS_BASE = apsw.VFS if apsw is not None else object
+
 MAX_LINES_PER_FILE = int(os.getenv("MAX_LINES_PER_FILE", "100000"))
+WRITE_BATCH_LINES = 1024
+EXPORT_BATCH_ROWS = 1000
+CHROME_WORKERS = max(1, int(os.getenv("CHROME_WORKERS", "4")))
+CHROME_PREFETCH = max(0, int(os.getenv("CHROME_PREFETCH", "2")))
+CHROME_DIRECT_READ = os.getenv("CHROME_DIRECT_READ", "0").lower() in {"1", "true", "yes"}
+DIRECT_VFS_NAME = "requiem-dissect-ro"
+WRITE_BUFFER_SIZE = 1 << 20
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+SENDFILE_CHUNK_SIZE = 64 * 1024 * 1024
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger("chrome_history")
 
 CHROME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+# Bornes (µs depuis CHROME_EPOCH) représentables par datetime
+CHROME_TIME_MIN_US = (datetime(1, 1, 1, tzinfo=timezone.utc) - CHROME_EPOCH) // timedelta(microseconds=1)
+CHROME_TIME_MAX_US = (datetime.max.replace(tzinfo=timezone.utc) - CHROME_EPOCH) // timedelta(microseconds=1)
+VECTORIZE_MIN_ROWS = 64
+SQLITE_CACHE_KIB = 65536
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
 USER_DIR_CANDIDATES = (
     "C:/Users",
     "C:/Documents and Settings",
@@ -60,6 +102,18 @@ TRANSITION_QUALIFIERS = {
 }
 
 
+def _qualifier_index(value: int) -> int:
+    # Octet haut (bits 24-31) -> bits 0-7, SERVER_REDIRECT (bit 23) -> bit 8
+    return ((value >> 24) & 0xFF) | ((value >> 15) & 0x100)
+
+
+# Table indexée par les 9 bits de qualificateurs : noms dans l'ordre de TRANSITION_QUALIFIERS
+QUALIFIER_TABLE = tuple(
+    tuple(name for mask, name in TRANSITION_QUALIFIERS.items() if _qualifier_index(mask) & idx)
+    for idx in range(512)
+)
+
+
 @dataclass
 class ScriptContext:
     case_id: Optional[str]
@@ -68,6 +122,31 @@ class ScriptContext:
     output_dir: Path
 
 
+def encode_line(obj: Dict, prefix: Optional[bytes] = None) -> bytes:
+    """Sérialise ``obj`` en une ligne JSONL UTF-8 (orjson si disponible).
+
+    ``prefix`` contient des champs déjà encodés (voir ``encode_prefix``), insérés après le
+    premier champ de ``obj`` (``@timestamp``) : l'ordre des clés reste celui d'origine.
+    """
+    if orjson is not None:
+        line = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+    if prefix is None:
+        return line
+    if not obj:
+        return b"{" + prefix + b"}\n"
+    first_key = next(iter(obj))
+    # longueur de '{"<clé>":<valeur>' : le premier champ encodé seul, sans '}\n'
+    head = len(encode_line({first_key: obj[first_key]})) - 2
+    return line[:head] + b"," + prefix + line[head:]
+
+
+def encode_prefix(fields: Dict) -> bytes:
+    """Pré-encode des champs constants (membres JSON sans accolades), à réutiliser pour chaque ligne."""
+    return encode_line(fields)[1:-2]
+
+
 class ChunkedJSONLWriter:
     def __init__(self, output_dir: Path, base_name: str, max_lines: int = MAX_LINES_PER_FILE) -> None:
         self.output_dir = output_dir
@@ -76,27 +155,48 @@ class ChunkedJSONLWriter:
         self._file_index = 0
         self._line_count = 0
         self._fh = None
+        self._buf = bytearray()
+        self._buf_rows = 0
+        self._lock = threading.Lock()
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def _flush_buffer(self) -> None:
+        if self._buf:
+            self._fh.write(self._buf)
+            self._buf.clear()
+        self._buf_rows = 0
+
     def _open_next_file(self) -> None:
         if self._fh:
+            self._flush_buffer()
             self._fh.close()
         filename = f"{self.base_name}_{self._file_index:05d}.jsonl"
-        self._fh = (self.output_dir / filename).open("w", encoding="utf-8")
+        self._fh = (self.output_dir / filename).open("wb", buffering=WRITE_BUFFER_SIZE)
         self._line_count = 0
         self._file_index += 1
         logger.debug("Nouveau fichier %s", filename)
 
     def write(self, obj: Dict) -> None:
-        if not self._fh or self._line_count >= self.max_lines:
-            self._open_next_file()
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        self._line_count += 1
+        self.write_many((obj,))
+
+    def write_many(self, objs: Iterable[Dict], prefix: Optional[bytes] = None) -> None:
+        """Écrit un lot d'objets ; sûr entre threads (un verrou par lot)."""
+        with self._lock:
+            for obj in objs:
+                if not self._fh or self._line_count >= self.max_lines:
+                    self._open_next_file()
+                self._buf += encode_line(obj, prefix)
+                self._buf_rows += 1
+                self._line_count += 1
+                if self._buf_rows >= WRITE_BATCH_LINES:
+                    self._flush_buffer()
 
     def close(self) -> None:
-        if self._fh:
-            self._fh.close()
-            self._fh = None
+        with self._lock:
+            if self._fh:
+                self._flush_buffer()
+                self._fh.close()
+                self._fh = None
 
 
 def env_or_exit(name: str) -> str:
@@ -168,30 +268,17 @@ def iter_history_files(target: Target) -> Iterator[TargetPath]:
         except FilesystemError:
             continue
         for segments in BROWSER_ROOTS:
-            base = local_app
-            valid = True
-            for segment in segments:
-                base = base / segment
-                try:
-                    exists = base.exists()
-                except FilesystemError:
-                    valid = False
-                    break
-                if not exists:
-                    valid = False
-                    break
-            if not valid:
-                continue
+            base = local_app.joinpath(*segments)
             try:
+                if not base.exists():
+                    continue
                 for profile in base.iterdir():
                     try:
                         if not profile.is_dir():
                             continue
-                    except FilesystemError:
-                        continue
-                    history = profile / "History"
-                    try:
-                        if history.exists() and history.is_file():
+                        history = profile / "History"
+                        # is_file() vaut False si le chemin n'existe pas
+                        if history.is_file():
                             yield history
                     except FilesystemError:
                         continue
@@ -209,33 +296,196 @@ def chrome_time_to_iso(value: Optional[int]) -> Optional[str]:
     return dt.isoformat().replace("+00:00", "Z")
 
 
-def decode_transition(value: Optional[int]) -> Dict[str, Optional[str]]:
+def chrome_times_to_iso(values: Sequence[Optional[int]]) -> List[Optional[str]]:
+    """Version vectorisée (NumPy) de chrome_time_to_iso pour un lot de valeurs."""
+    count = len(values)
+    if np is None or count < VECTORIZE_MIN_ROWS:
+        return [chrome_time_to_iso(value) for value in values]
+    is_int = np.fromiter((type(value) is int for value in values), dtype=bool, count=count)
+    raw = np.fromiter((value if type(value) is int else 0 for value in values), dtype=np.int64, count=count)
+    valid = is_int & (raw >= CHROME_TIME_MIN_US) & (raw <= CHROME_TIME_MAX_US)
+    raw = np.where(valid, raw, 0)
+    stamps = np.datetime64("1601-01-01T00:00:00", "us") + raw.astype("timedelta64[us]")
+    # isoformat() omet les microsecondes lorsqu'elles sont nulles
+    text = np.where(
+        raw % 1_000_000 == 0,
+        np.datetime_as_string(stamps, unit="s"),
+        np.datetime_as_string(stamps, unit="us"),
+    )
+    result = np.char.add(text, "Z").tolist()
+    for idx in np.flatnonzero(~valid):
+        result[idx] = chrome_time_to_iso(values[idx])
+    return result
+
+
+@functools.lru_cache(maxsize=4096)
+def decode_transition(value: Optional[int]) -> Dict[str, object]:
+    """Décode une valeur de transition Chrome.
+
+    Le résultat est mis en cache et partagé entre les lignes : il ne dépend que de
+    ``value`` et n'est jamais modifié après coup (seulement sérialisé).
+    """
     if value is None:
-        return {"raw": None, "core": None, "qualifiers": []}
+        return {"raw": None, "core": None, "qualifiers": ()}
     core = value & 0xFF
-    qualifiers = [name for mask, name in TRANSITION_QUALIFIERS.items() if value & mask]
     return {
         "raw": value,
         "core": TRANSITION_CORE.get(core, str(core)),
-        "qualifiers": qualifiers,
+        "qualifiers": QUALIFIER_TABLE[_qualifier_index(value)],
     }
 
 
+def real_fileno(handle) -> Optional[int]:
+    """Descripteur système du fichier, ou None pour un flux virtuel dissect."""
+    try:
+        return handle.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def sendfile_copy(src_fd: int, dst_fd: int) -> None:
+    """Copie intégrale dans le noyau (sans tampon en espace utilisateur)."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    offset = 0
+    while True:
+        sent = os.sendfile(dst_fd, src_fd, offset, SENDFILE_CHUNK_SIZE)
+        if sent == 0:
+            break
+        offset += sent
+
+
+def path_digest(remote: TargetPath) -> int:
+    """Empreinte 32 bits stable (indépendante de PYTHONHASHSEED) du chemin distant."""
+    raw = str(remote).encode("utf-8", "surrogatepass")
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(raw) & 0xFFFFFFFF
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=4).digest(), "big")
+
+
 def copy_remote_file(remote: TargetPath, workspace: Path) -> Path:
     workspace.mkdir(parents=True, exist_ok=True)
-    safe_suffix = abs(hash(str(remote))) & 0xFFFF
-    target = workspace / f"history_{safe_suffix:04x}.db"
+    target = workspace / f"history_{path_digest(remote):08x}.db"
     with remote.open("rb") as src, target.open("wb") as dst:
-        shutil.copyfileobj(src, dst)
+        src_fd = real_fileno(src)
+        if src_fd is not None and hasattr(os, "sendfile"):
+            try:
+                sendfile_copy(src_fd, dst.fileno())
+                return target
+            except OSError as exc:
+                logger.debug("sendfile indisponible pour %s (%s), copie classique", remote, exc)
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
     return target
 
 
-def export_history(remote: TargetPath, ctx: ScriptContext, writer: ChunkedJSONLWriter) -> None:
-    logger.info("Extraction Chrome: %s", remote)
-    tmp_workspace = ctx.output_dir / "tmp"
-    local_copy = copy_remote_file(remote, tmp_workspace)
+HISTORY_QUERY_TEMPLATE = """
+    SELECT
+        visits.id AS visit_id,
+        visits.visit_time,
+        visits.from_visit,
+        visits.transition,
+        urls.id AS url_id,
+        urls.url,
+        urls.title,
+        urls.visit_count,
+        urls.typed_count,
+        urls.last_visit_time
+    FROM visits {index_hint}
+    JOIN urls ON visits.url = urls.id
+    ORDER BY visits.visit_time ASC
+"""
+# visits_time_index fait partie du schéma Chrome : le parcours de l'index fournit
+# directement l'ordre chronologique, sans tri par SQLite (B-tree temporaire).
+HISTORY_QUERY_INDEXED = HISTORY_QUERY_TEMPLATE.format(index_hint="INDEXED BY visits_time_index")
+HISTORY_QUERY = HISTORY_QUERY_TEMPLATE.format(index_hint="")
+
+
+def history_prefix(ctx: ScriptContext, remote: str) -> bytes:
+    return encode_prefix(
+        {
+            "case_id": ctx.case_id,
+            "evidence_uid": ctx.evidence_uid,
+            "source": "chrome_history",
+            "history_path": remote,
+        }
+    )
+
+
+def execute_history_query(conn, error_type: type):
+    """Exécute la requête via visits_time_index, ou avec tri SQLite si l'index est absent."""
     try:
-        conn = sqlite3.connect(f"file:{local_copy}?mode=ro", uri=True)
+        return conn.execute(HISTORY_QUERY_INDEXED)
+    except error_type as exc:
+        logger.debug("visits_time_index indisponible (%s), tri effectué par SQLite", exc)
+        return conn.execute(HISTORY_QUERY)
+
+
+def write_visit_rows(row_batches: Iterable[Sequence[tuple]], prefix: bytes, writer: ChunkedJSONLWriter) -> int:
+    """Convertit les lots de lignes HISTORY_QUERY en documents et les écrit ; renvoie le nombre de lignes."""
+    total_rows = 0
+    batch: List[Dict] = []
+    for rows in row_batches:
+        visit_times = chrome_times_to_iso([row[1] for row in rows])
+        last_visit_times = chrome_times_to_iso([row[9] for row in rows])
+        for (
+            visit_id,
+            _visit_time,
+            from_visit,
+            transition,
+            url_id,
+            url,
+            title,
+            visit_count,
+            typed_count,
+            _last_visit_time,
+        ), visit_iso, last_visit_iso in zip(rows, visit_times, last_visit_times):
+            batch.append(
+                {
+                    "@timestamp": visit_iso,
+                    "visit_id": visit_id,
+                    "from_visit": from_visit,
+                    "url_id": url_id,
+                    "url": url,
+                    "title": title,
+                    "visit_count": visit_count,
+                    "typed_count": typed_count,
+                    "last_visit_time": last_visit_iso,
+                    "transition": decode_transition(transition),
+                }
+            )
+        total_rows += len(rows)
+        writer.write_many(batch, prefix)
+        batch.clear()
+    return total_rows
+
+
+_worker_state = threading.local()
+
+
+def worker_connection() -> sqlite3.Connection:
+    """Connexion SQLite propre au thread, réutilisée pour toutes les bases du worker.
+
+    Chaque base History est rattachée (ATTACH) puis détachée : on évite ainsi
+    l'ouverture/fermeture d'une connexion et le réglage des PRAGMA à chaque fichier.
+    Le schéma ``main`` reste vide, les tables de HISTORY_QUERY se résolvent donc
+    dans ``history``.
+    """
+    conn = getattr(_worker_state, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(":memory:", uri=True)
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _worker_state.conn = conn
+    return conn
+
+
+def export_history(local_copy: Path, remote: str, ctx: ScriptContext, writer: ChunkedJSONLWriter) -> None:
+    """Exporte une copie locale de base History (exécuté dans un thread worker)."""
+    conn = worker_connection()
+    try:
+        conn.execute("ATTACH DATABASE ? AS history", (f"file:{local_copy}?mode=ro",))
     except sqlite3.Error as exc:
         logger.error("Connexion SQLite impossible (%s): %s", remote, exc)
         try:
@@ -243,49 +493,24 @@ def export_history(remote: TargetPath, ctx: ScriptContext, writer: ChunkedJSONLW
         except OSError:
             pass
         return
-    conn.row_factory = sqlite3.Row
-    query = """
-        SELECT
-            visits.id AS visit_id,
-            visits.visit_time,
-            visits.from_visit,
-            visits.transition,
-            urls.id AS url_id,
-            urls.url,
-            urls.title,
-            urls.visit_count,
-            urls.typed_count,
-            urls.last_visit_time
-        FROM visits
-        JOIN urls ON visits.url = urls.id
-        ORDER BY visits.visit_time ASC
-    """
     total_rows = 0
+    cursor = None
     try:
-        for row in conn.execute(query):
-            transition = decode_transition(row["transition"])
-            event = {
-                "@timestamp": chrome_time_to_iso(row["visit_time"]),
-                "case_id": ctx.case_id,
-                "evidence_uid": ctx.evidence_uid,
-                "source": "chrome_history",
-                "history_path": str(remote),
-                "visit_id": row["visit_id"],
-                "from_visit": row["from_visit"],
-                "url_id": row["url_id"],
-                "url": row["url"],
-                "title": row["title"],
-                "visit_count": row["visit_count"],
-                "typed_count": row["typed_count"],
-                "last_visit_time": chrome_time_to_iso(row["last_visit_time"]),
-                "transition": transition,
-            }
-            writer.write(event)
-            total_rows += 1
+        # cache_size/mmap_size sont propres à chaque schéma rattaché
+        conn.execute(f"PRAGMA history.cache_size=-{SQLITE_CACHE_KIB}")
+        conn.execute(f"PRAGMA history.mmap_size={SQLITE_MMAP_SIZE}")
+        cursor = execute_history_query(conn, sqlite3.OperationalError)
+        cursor.arraysize = EXPORT_BATCH_ROWS
+        total_rows = write_visit_rows(iter(cursor.fetchmany, []), history_prefix(ctx, remote), writer)
     except sqlite3.Error as exc:
         logger.exception("Erreur pendant l'export %s: %s", remote, exc)
     finally:
-        conn.close()
+        if cursor is not None:
+            cursor.close()
+        try:
+            conn.execute("DETACH DATABASE history")
+        except sqlite3.Error as exc:
+            logger.warning("Détachement SQLite impossible (%s): %s", remote, exc)
         try:
             local_copy.unlink()
         except OSError:
@@ -293,15 +518,142 @@ def export_history(remote: TargetPath, ctx: ScriptContext, writer: ChunkedJSONLW
     logger.info("Entrées exportées depuis %s: %d", remote, total_rows)
 
 
+class TargetVFSFile:
+    """Fichier SQLite en lecture seule dont les pages sont lues dans la cible dissect."""
+
+    def __init__(self, handle) -> None:
+        self._handle = handle
+        self._size = handle.seek(0, os.SEEK_END)
+
+    def xRead(self, amount: int, offset: int) -> bytes:
+        self._handle.seek(offset)
+        return self._handle.read(amount)
+
+    def xFileSize(self) -> int:
+        return self._size
+
+    def xClose(self) -> None:
+        self._handle.close()
+
+    def xLock(self, level: int) -> None:
+        pass
+
+    def xUnlock(self, level: int) -> None:
+        pass
+
+    def xCheckReservedLock(self) -> bool:
+        return False
+
+    def xSectorSize(self) -> int:
+        return 4096
+
+    def xDeviceCharacteristics(self) -> int:
+        return 0
+
+    def xFileControl(self, op: int, pointer: int) -> bool:
+        return False
+
+    def xSync(self, flags: int) -> None:
+        pass
+
+    def xWrite(self, data: bytes, offset: int) -> None:
+        raise apsw.ReadOnlyError("base History ouverte en lecture seule")
+
+    def xTruncate(self, newsize: int) -> None:
+        raise apsw.ReadOnlyError("base History ouverte en lecture seule")
+
+
+class DissectVFS(_VFS_BASE):
+    """VFS apsw servant les bases History directement depuis la cible, sans copie locale.
+
+    SQLite ne lit que les pages nécessaires à la requête. Les fichiers annexes
+    (-journal, -wal) sont déclarés absents, comme pour une copie de la seule base.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(DIRECT_VFS_NAME, "")
+        self._files: Dict[str, TargetPath] = {}
+        self._counter = 0
+
+    def register(self, remote: TargetPath) -> str:
+        self._counter += 1
+        name = f"/{DIRECT_VFS_NAME}/{self._counter}/History"
+        self._files[name] = remote
+        return name
+
+    def unregister(self, name: str) -> None:
+        self._files.pop(name, None)
+
+    def xAccess(self, pathname: str, flags: int) -> bool:
+        return pathname in self._files
+
+    def xFullPathname(self, name: str) -> str:
+        return name
+
+    def xOpen(self, name, flags):
+        filename = name.filename() if isinstance(name, apsw.URIFilename) else name
+        remote = self._files.get(filename)
+        if remote is None:
+            # fichiers temporaires de SQLite : VFS par défaut
+            return apsw.VFSFile("", name, flags)
+        return TargetVFSFile(remote.open("rb"))
+
+
+def export_history_direct(vfs: DissectVFS, remote: TargetPath, ctx: ScriptContext, writer: ChunkedJSONLWriter) -> None:
+    """Exporte une base History lue en place via le VFS apsw (thread principal uniquement)."""
+    name = vfs.register(remote)
+    total_rows = 0
+    try:
+        conn = apsw.Connection(name, flags=apsw.SQLITE_OPEN_READONLY, vfs=DIRECT_VFS_NAME)
+        try:
+            conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            cursor = execute_history_query(conn, apsw.SQLError)
+            row_batches = iter(lambda: list(islice(cursor, EXPORT_BATCH_ROWS)), [])
+            total_rows = write_visit_rows(row_batches, history_prefix(ctx, str(remote)), writer)
+        finally:
+            conn.close()
+    except (apsw.Error, FilesystemError, OSError) as exc:
+        logger.exception("Erreur pendant l'export %s: %s", remote, exc)
+    finally:
+        vfs.unregister(name)
+    logger.info("Entrées exportées depuis %s: %d", remote, total_rows)
+
+
 def main() -> None:
     ctx = load_context()
     writer = ChunkedJSONLWriter(ctx.output_dir, base_name="chrome_history")
+    tmp_workspace = ctx.output_dir / "tmp"
     files = 0
+    direct_vfs: Optional[DissectVFS] = None
+    if CHROME_DIRECT_READ:
+        if apsw is None:
+            logger.warning("CHROME_DIRECT_READ ignoré : module apsw absent, copie locale des bases")
+        else:
+            direct_vfs = DissectVFS()
     try:
-        with Target.open(str(ctx.evidence_path)) as target:
-            for remote_history in iter_history_files(target):
-                files += 1
-                export_history(remote_history, ctx, writer)
+        # dissect.target n'est pas thread-safe : la copie reste dans le thread principal,
+        # seul l'export SQLite (qui libère le GIL) est réparti sur le pool. La copie de la
+        # base suivante se fait pendant l'export des précédentes, avec au plus
+        # CHROME_PREFETCH copies en attente pour borner l'espace temporaire.
+        staged = threading.BoundedSemaphore(CHROME_WORKERS + CHROME_PREFETCH)
+        with ThreadPoolExecutor(max_workers=CHROME_WORKERS) as executor:
+            futures = []
+            with Target.open(str(ctx.evidence_path)) as target:
+                for remote_history in iter_history_files(target):
+                    files += 1
+                    logger.info("Extraction Chrome: %s", remote_history)
+                    if direct_vfs is not None:
+                        # lecture directe : reste dans ce thread, seul à accéder à la cible
+                        export_history_direct(direct_vfs, remote_history, ctx, writer)
+                        continue
+                    staged.acquire()
+                    local_copy = copy_remote_file(remote_history, tmp_workspace)
+                    future = executor.submit(export_history, local_copy, str(remote_history), ctx, writer)
+                    future.add_done_callback(lambda _future: staged.release())
+                    futures.append(future)
+            for future in futures:
+                future.result()
     except TargetError as exc:
         raise SystemExit(f"Impossible d'ouvrir la preuve avec dissect.target: {exc}") from exc
     finally:
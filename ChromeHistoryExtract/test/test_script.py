@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests de non-régression de la conversion vectorisée des horodatages Chrome.
+
+Chaque lot est comparé à l'implémentation scalaire d'origine, recopiée ci-dessous.
+Lancement : ``python3 test/test_script.py``.
+"""
+
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import script
+
+CHROME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+# 1970-01-01T00:00:00Z exprimé en µs depuis CHROME_EPOCH
+UNIX_EPOCH_US = 11_644_473_600_000_000
+
+
+def reference_time_to_iso(value):
+    """Conversion d'origine, valeur par valeur."""
+    if value is None:
+        return None
+    try:
+        dt = CHROME_EPOCH + timedelta(microseconds=int(value))
+    except (OverflowError, ValueError):
+        return None
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+class ChromeTimesToIsoTest(unittest.TestCase):
+    def assert_same_as_reference(self, values):
+        # Complète le lot pour passer par la branche NumPy (VECTORIZE_MIN_ROWS)
+        padded = list(values) + [UNIX_EPOCH_US] * script.VECTORIZE_MIN_ROWS
+        expected = [reference_time_to_iso(value) for value in padded]
+        self.assertEqual(script.chrome_times_to_iso(padded), expected)
+        # Petits lots : branche scalaire
+        self.assertEqual(script.chrome_times_to_iso(list(values)), expected[: len(values)])
+
+    def test_null_and_zero(self):
+        self.assert_same_as_reference([None, 0, None, 0])
+
+    def test_epoch_boundaries(self):
+        self.assert_same_as_reference(
+            [
+                1,
+                -1,
+                UNIX_EPOCH_US - 1,
+                UNIX_EPOCH_US,
+                UNIX_EPOCH_US + 1,
+                UNIX_EPOCH_US + 1_000_000,
+                UNIX_EPOCH_US + 999_999,
+            ]
+        )
+
+    def test_datetime_range_limits(self):
+        low, high = script.CHROME_TIME_MIN_US, script.CHROME_TIME_MAX_US
+        self.assert_same_as_reference([low - 1, low, low + 1, high - 1, high, high + 1])
+        self.assertIsNone(script.chrome_times_to_iso([high + 1] * script.VECTORIZE_MIN_ROWS)[0])
+
+    def test_non_integer_values(self):
+        self.assert_same_as_reference([True, False, 1.5, "13300000000000000"])
+
+    def test_sqlite_integer_limits(self):
+        # INTEGER SQLite : entier signé 64 bits
+        self.assert_same_as_reference([2**63 - 1, -(2**63)])
+
+    def test_realistic_visits(self):
+        values = [13_350_000_000_000_000 + step * 1_234_567 for step in range(500)]
+        values[::7] = [None] * len(values[::7])
+        values[::11] = [0] * len(values[::11])
+        self.assert_same_as_reference(values)
+
+
+if __name__ == "__main__":
+    unittest.main()
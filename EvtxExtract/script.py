@@ -4,19 +4,65 @@ from __future__ import annotations
 
 import json
 import logging
+import multiprocessing
 import os
+import pickle
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, Optional
-import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - repli sur la bibliothèque standard
+    orjson = None  # type: ignore
 
 try:
     from Evtx.Evtx import Evtx  # type: ignore
 except Exception:  # pragma: no cover - import résolu dynamiquement
     Evtx = None  # type: ignore
 
+try:
+    from lxml import etree  # type: ignore
+except Exception:  # pragma: no cover - import résolu dynamiquement
+    etree = None  # type: ignore
+
 EVTX_NS = "{http://schemas.microsoft.com/win/2004/08/events/event}"
+TAG_SYSTEM = EVTX_NS + "System"
+TAG_CHANNEL = EVTX_NS + "Channel"
+TAG_COMPUTER = EVTX_NS + "Computer"
+TAG_EVENT_ID = EVTX_NS + "EventID"
+TAG_EVENT_RECORD_ID = EVTX_NS + "EventRecordID"
+TAG_LEVEL = EVTX_NS + "Level"
+TAG_KEYWORDS = EVTX_NS + "Keywords"
+TAG_OPCODE = EVTX_NS + "Opcode"
+TAG_TASK = EVTX_NS + "Task"
+TAG_PROVIDER = EVTX_NS + "Provider"
+TAG_SECURITY = EVTX_NS + "Security"
+TAG_TIME_CREATED = EVTX_NS + "TimeCreated"
+TAG_EXECUTION = EVTX_NS + "Execution"
+TAG_CORRELATION = EVTX_NS + "Correlation"
+TAG_EVENT_DATA = EVTX_NS + "EventData"
+TAG_USER_DATA = EVTX_NS + "UserData"
+TAG_DATA = EVTX_NS + "Data"
+# Parser partagé : pas de résolution d'entités ni d'accès réseau
+XML_PARSER = (
+    etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True) if etree is not None else None
+)
 MAX_LINES_PER_FILE = int(os.getenv("MAX_LINES_PER_FILE", "100000"))
+EVTX_WORKERS = int(os.getenv("EVTX_WORKERS", "0")) or (os.cpu_count() or 1)
+# Lots d'événements déversés par les workers, hors du répertoire de sortie indexé
+EVTX_SPILL_DIR = os.getenv("EVTX_SPILL_DIR") or tempfile.gettempdir()
+WRITE_BATCH_LINES = 1024
+WRITE_BUFFER_SIZE = 1 << 20
+# Lots en attente d'écriture (~10 000 événements) : borne la mémoire si le disque ralentit
+WRITE_QUEUE_BATCHES = 10
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger("evtx_extract")
@@ -30,6 +76,31 @@ class ScriptContext:
     output_dir: Path
 
 
+def encode_line(obj: Dict, prefix: Optional[bytes] = None) -> bytes:
+    """Sérialise ``obj`` en une ligne JSONL UTF-8 (orjson si disponible).
+
+    ``prefix`` contient des champs déjà encodés (voir ``encode_prefix``), insérés après le
+    premier champ de ``obj`` (``@timestamp``) : l'ordre des clés reste celui d'origine.
+    """
+    if orjson is not None:
+        line = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+    if prefix is None:
+        return line
+    if not obj:
+        return b"{" + prefix + b"}\n"
+    first_key = next(iter(obj))
+    # longueur de '{"<clé>":<valeur>' : le premier champ encodé seul, sans '}\n'
+    head = len(encode_line({first_key: obj[first_key]})) - 2
+    return line[:head] + b"," + prefix + line[head:]
+
+
+def encode_prefix(fields: Dict) -> bytes:
+    """Pré-encode des champs constants (membres JSON sans accolades), à réutiliser pour chaque ligne."""
+    return encode_line(fields)[1:-2]
+
+
 class ChunkedJSONLWriter:
     """Écrit des objets JSON dans plusieurs fichiers si nécessaire."""
 
@@ -40,32 +111,101 @@ class ChunkedJSONLWriter:
         self._file_index = 0
         self._line_count = 0
         self._fh = None
+        self._buf = bytearray()
+        self._buf_rows = 0
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def _flush_buffer(self) -> None:
+        if self._buf:
+            self._fh.write(self._buf)
+            self._buf.clear()
+        self._buf_rows = 0
+
     def _open_next_file(self) -> None:
         if self._fh:
+            self._flush_buffer()
             self._fh.close()
         filename = f"{self.base_name}_{self._file_index:05d}.jsonl"
-        self._fh = (self.output_dir / filename).open("w", encoding="utf-8")
+        self._fh = (self.output_dir / filename).open("wb", buffering=WRITE_BUFFER_SIZE)
         self._line_count = 0
         self._file_index += 1
         logger.debug("Nouveau fichier JSONL: %s", filename)
 
     def write(self, obj: Dict) -> None:
-        if not self._fh or self._line_count >= self.max_lines:
-            self._open_next_file()
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        self._line_count += 1
+        self.write_many((obj,))
+
+    def write_many(self, objs: Iterable[Dict], prefix: Optional[bytes] = None) -> int:
+        """Écrit une suite d'objets partageant ``prefix`` ; renvoie le nombre de lignes."""
+        written = 0
+        for obj in objs:
+            if not self._fh or self._line_count >= self.max_lines:
+                self._open_next_file()
+            self._buf += encode_line(obj, prefix)
+            self._buf_rows += 1
+            self._line_count += 1
+            written += 1
+            if self._buf_rows >= WRITE_BATCH_LINES:
+                self._flush_buffer()
+        return written
 
     def close(self) -> None:
         if self._fh:
+            self._flush_buffer()
             self._fh.close()
             self._fh = None
 
 
+class BackgroundWriter:
+    """Thread d'écriture unique, propriétaire du ChunkedJSONLWriter et alimenté par une file bornée.
+
+    Le parsing continue pendant la sérialisation et les écritures disque. Une erreur
+    d'écriture est relancée dans le thread appelant au ``put`` suivant ou au ``close``.
+    """
+
+    def __init__(self, writer: ChunkedJSONLWriter, max_batches: int = WRITE_QUEUE_BATCHES) -> None:
+        self._writer = writer
+        self._queue: "queue.Queue[Optional[Tuple[bytes, List[Dict]]]]" = queue.Queue(maxsize=max_batches)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._drain, name="evtx-writer", daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                # on continue à vider la file pour ne pas bloquer le producteur
+                continue
+            prefix, events = item
+            try:
+                self._writer.write_many(events, prefix)
+            except BaseException as exc:
+                self._error = exc
+
+    def put(self, prefix: bytes, events: List[Dict]) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put((prefix, events))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.close()
+        if self._error is not None:
+            raise self._error
+
+
+def iter_batches(events: Iterable[Dict], size: int = WRITE_BATCH_LINES) -> Iterator[List[Dict]]:
+    iterator = iter(events)
+    return iter(lambda: list(islice(iterator, size)), [])
+
+
 def ensure_dependencies() -> None:
     if Evtx is None:
         raise SystemExit("python-evtx n'est pas installé (pip install -r requirements.txt)")
+    if etree is None:
+        raise SystemExit("lxml n'est pas installé (pip install -r requirements.txt)")
 
 
 def load_context() -> ScriptContext:
@@ -86,88 +226,257 @@ def load_context() -> ScriptContext:
     return ctx
 
 
-def discover_evtx_files(root: Path) -> Iterator[Path]:
-    for path in root.rglob("*.evtx"):
-        if path.is_file():
-            yield path
+def discover_evtx_files(root: Path) -> List[Path]:
+    """Liste les fichiers .evtx sous ``root``, les plus volumineux en premier.
+
+    Le parcours via os.scandir réutilise le type renvoyé par le système pour chaque
+    entrée ; seul un fichier retenu coûte un stat (pour sa taille). Traiter les gros
+    fichiers d'abord équilibre mieux la charge du pool de processus.
+    """
+    found = []
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            iterator = os.scandir(current)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".evtx") and entry.is_file():
+                        found.append((entry.stat().st_size, entry.path))
+                except OSError:
+                    continue
+    found.sort(key=lambda item: item[0], reverse=True)
+    return [Path(path) for _, path in found]
+
+
+def event_prefix(path: Path, ctx: ScriptContext) -> bytes:
+    """Champs constants pour tous les événements d'un fichier, encodés une seule fois."""
+    return encode_prefix(
+        {
+            "case_id": ctx.case_id,
+            "evidence_uid": ctx.evidence_uid,
+            "source": "evtx_extract",
+            "evtx_path": str(path),
+        }
+    )
 
 
-def parse_evtx_file(path: Path, ctx: ScriptContext) -> Iterator[Dict]:
+def parse_evtx_file(path: Path) -> Iterator[Dict]:
+    """Produit la partie variable des événements de ``path`` (voir ``event_prefix``)."""
     logger.info("Parsing %s", path)
     try:
         with Evtx(str(path)) as log:
             for record in log.records():
-                event = build_event(record.xml(), path, ctx)
+                event = build_event(record.xml(), path)
                 if event:
                     yield event
     except Exception as exc:
         logger.exception("Erreur lors du parsing de %s: %s", path, exc)
 
 
-def build_event(xml_data: str, evtx_path: Path, ctx: ScriptContext) -> Optional[Dict]:
+def prefetch_file(path: Path) -> None:
+    """Déclenche la lecture anticipée asynchrone de ``path`` par le noyau."""
+    if not hasattr(os, "posix_fadvise"):
+        return
     try:
-        root = ET.fromstring(xml_data)
-    except ET.ParseError as exc:
-        logger.debug("XML invalide dans %s: %s", evtx_path, exc)
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def collect_evtx_events(path: Path, spill_dir: str) -> str:
+    """Point d'entrée des workers : parse un fichier complet dans un processus dédié.
+
+    Les événements sont déversés par lots dans un fichier temporaire de ``spill_dir`` dont
+    le chemin est renvoyé : le résultat d'un fichier ne transite jamais en entier en mémoire.
+    """
+    prefetch_file(path)
+    fd, spill_path = tempfile.mkstemp(suffix=".pickle", dir=spill_dir)
+    with os.fdopen(fd, "wb") as handle:
+        for batch in iter_batches(parse_evtx_file(path)):
+            pickle.dump(batch, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return spill_path
+
+
+def read_spilled_events(spill_path: str) -> Iterator[Dict]:
+    """Relit les lots écrits par ``collect_evtx_events`` puis supprime le fichier temporaire."""
+    try:
+        with open(spill_path, "rb") as handle:
+            while True:
+                try:
+                    batch = pickle.load(handle)
+                except EOFError:
+                    return
+                yield from batch
+    finally:
+        try:
+            os.unlink(spill_path)
+        except OSError:
+            pass
+
+
+def iter_parsed_serial(paths: Sequence[Path], ctx: ScriptContext) -> Iterator[Tuple[bytes, Iterable[Dict]]]:
+    for idx, path in enumerate(paths):
+        if idx + 1 < len(paths):
+            # Le fichier suivant est lu par le noyau pendant le parsing de celui-ci
+            prefetch_file(paths[idx + 1])
+        yield event_prefix(path, ctx), parse_evtx_file(path)
+
+
+def iter_parsed_files(
+    paths: Sequence[Path], ctx: ScriptContext, workers: int
+) -> Iterator[Tuple[bytes, Iterable[Dict]]]:
+    """Produit (préfixe, événements) par fichier, en parallèle si plusieurs workers sont disponibles.
+
+    Si le pool casse (worker tué, par ex. OOM), les fichiers non traités sont parsés
+    séquentiellement dans le processus principal.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        yield from iter_parsed_serial(paths, ctx)
+        return
+    workers = min(workers, len(paths))
+    spill_dir = tempfile.mkdtemp(prefix="evtx_spill_", dir=EVTX_SPILL_DIR)
+    remaining = iter(paths)
+    broken: List[Path] = []
+    try:
+        # spawn : le thread d'écriture (BackgroundWriter) tourne déjà, un fork pourrait
+        # hériter de verrous tenus (file, logging, tampon) et bloquer les workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Au plus workers + 1 fichiers en cours : le suivant est prêt dès qu'un worker se libère
+            futures = {
+                executor.submit(collect_evtx_events, path, spill_dir): path for path in islice(remaining, workers + 1)
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = futures.pop(future)
+                    spill_path = None
+                    try:
+                        spill_path = future.result()
+                    except BrokenProcessPool:
+                        broken.append(path)
+                        continue
+                    except Exception as exc:
+                        logger.error("Worker en échec sur %s: %s", path, exc)
+                    next_path = None if broken else next(remaining, None)
+                    if next_path is not None:
+                        try:
+                            futures[executor.submit(collect_evtx_events, next_path, spill_dir)] = next_path
+                        except BrokenProcessPool:
+                            broken.append(next_path)
+                    if spill_path is not None:
+                        yield event_prefix(path, ctx), read_spilled_events(spill_path)
+        if broken:
+            broken.extend(remaining)
+            logger.error("Pool de workers interrompu, %d fichier(s) restant(s) traités séquentiellement", len(broken))
+            yield from iter_parsed_serial(broken, ctx)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def _elem_text(elem) -> Optional[str]:
+    return elem.text
+
+
+def _elem_attrib(elem):
+    return elem.attrib
+
+
+_NO_ATTRIB: Dict[str, str] = {}
+# Balise enfant de System -> (clé intermédiaire, extracteur)
+SYSTEM_HANDLERS = {
+    TAG_CHANNEL: ("channel", _elem_text),
+    TAG_COMPUTER: ("computer", _elem_text),
+    TAG_EVENT_ID: ("event_id", _elem_text),
+    TAG_EVENT_RECORD_ID: ("event_record_id", _elem_text),
+    TAG_LEVEL: ("event_level", _elem_text),
+    TAG_KEYWORDS: ("keywords", _elem_text),
+    TAG_OPCODE: ("opcode", _elem_text),
+    TAG_TASK: ("task", _elem_text),
+    TAG_PROVIDER: ("provider", _elem_attrib),
+    TAG_SECURITY: ("security", _elem_attrib),
+    TAG_TIME_CREATED: ("time_created", _elem_attrib),
+    TAG_EXECUTION: ("execution", _elem_attrib),
+    TAG_CORRELATION: ("correlation", _elem_attrib),
+}
+
+
+def parse_data_block(block) -> Optional[Dict[str, Optional[str]]]:
+    if block is None:
         return None
+    entries: Dict[str, Optional[str]] = {}
+    for data in block.iterchildren(TAG_DATA):
+        entries[data.get("Name") or "Value"] = data.text
+    return entries or None
 
-    system = root.find(f"{EVTX_NS}System")
+
+def build_event(xml_data: str, evtx_path: Path) -> Optional[Dict]:
+    try:
+        root = etree.fromstring(xml_data.encode("utf-8"), XML_PARSER)
+    except etree.XMLSyntaxError as exc:
+        logger.debug("XML invalide dans %s: %s", evtx_path, exc)
+        return None
+    return build_event_from_element(root)
+
+
+def build_event_from_element(root) -> Optional[Dict]:
+    """Construit l'événement à partir d'un élément <Event> lxml déjà parsé.
+
+    ``record.lxml()`` convient aussi, mais python-evtx y rend le XML texte puis le
+    re-parse : parser ``record.xml()`` avec XML_PARSER ne coûte pas davantage.
+    """
+    # Parcours inversé : la première occurrence d'une balise l'emporte, comme avec find()
+    system = None
+    blocks = {}
+    for child in reversed(root):
+        tag = child.tag
+        if tag == TAG_SYSTEM:
+            system = child
+        elif tag == TAG_EVENT_DATA or tag == TAG_USER_DATA:
+            blocks[tag] = child
     if system is None:
         return None
 
-    def text(tag: str) -> Optional[str]:
-        elem = system.find(f"{EVTX_NS}{tag}")
-        return elem.text if elem is not None else None
-
-    provider = system.find(f"{EVTX_NS}Provider")
-    provider_name = provider.attrib.get("Name") if provider is not None else None
-    provider_guid = provider.attrib.get("Guid") if provider is not None else None
-    security = system.find(f"{EVTX_NS}Security")
-    user_sid = security.attrib.get("UserID") if security is not None else None
-
-    timestamp = None
-    time_created = system.find(f"{EVTX_NS}TimeCreated")
-    if time_created is not None:
-        timestamp = time_created.attrib.get("SystemTime")
-
-    def parse_data_block(block_name: str) -> Optional[Dict[str, Optional[str]]]:
-        block = root.find(f"{EVTX_NS}{block_name}")
-        if block is None:
-            return None
-        entries: Dict[str, Optional[str]] = {}
-        for data in block.findall(f"{EVTX_NS}Data"):
-            key = data.attrib.get("Name") or "Value"
-            entries[key] = data.text
-        return entries or None
-
-    execution = system.find(f"{EVTX_NS}Execution")
-    process_id = execution.attrib.get("ProcessID") if execution is not None else None
-    thread_id = execution.attrib.get("ThreadID") if execution is not None else None
-    correlation = system.find(f"{EVTX_NS}Correlation")
+    fields = {}
+    for child in reversed(system):
+        handler = SYSTEM_HANDLERS.get(child.tag)
+        if handler is not None:
+            fields[handler[0]] = handler[1](child)
+
+    provider = fields.get("provider", _NO_ATTRIB)
+    execution = fields.get("execution", _NO_ATTRIB)
+    correlation = fields.get("correlation", _NO_ATTRIB)
 
     event = {
-        "@timestamp": timestamp,
-        "case_id": ctx.case_id,
-        "evidence_uid": ctx.evidence_uid,
-        "source": "evtx_extract",
-        "evtx_path": str(evtx_path),
-        "channel": text("Channel"),
-        "computer": text("Computer"),
-        "event_id": text("EventID"),
-        "event_record_id": text("EventRecordID"),
-        "event_level": text("Level"),
-        "keywords": text("Keywords"),
-        "opcode": text("Opcode"),
-        "provider_name": provider_name,
-        "provider_guid": provider_guid,
-        "task": text("Task"),
-        "user_sid": user_sid,
-        "process_id": process_id,
-        "thread_id": thread_id,
-        "activity_id": correlation.attrib.get("ActivityID") if correlation is not None else None,
-        "related_activity_id": correlation.attrib.get("RelatedActivityID") if correlation is not None else None,
-        "event_data": parse_data_block("EventData"),
-        "user_data": parse_data_block("UserData"),
+        "@timestamp": fields.get("time_created", _NO_ATTRIB).get("SystemTime"),
+        "channel": fields.get("channel"),
+        "computer": fields.get("computer"),
+        "event_id": fields.get("event_id"),
+        "event_record_id": fields.get("event_record_id"),
+        "event_level": fields.get("event_level"),
+        "keywords": fields.get("keywords"),
+        "opcode": fields.get("opcode"),
+        "provider_name": provider.get("Name"),
+        "provider_guid": provider.get("Guid"),
+        "task": fields.get("task"),
+        "user_sid": fields.get("security", _NO_ATTRIB).get("UserID"),
+        "process_id": execution.get("ProcessID"),
+        "thread_id": execution.get("ThreadID"),
+        "activity_id": correlation.get("ActivityID"),
+        "related_activity_id": correlation.get("RelatedActivityID"),
+        "event_data": parse_data_block(blocks.get(TAG_EVENT_DATA)),
+        "user_data": parse_data_block(blocks.get(TAG_USER_DATA)),
     }
     return event
 
@@ -175,16 +484,17 @@ def build_event(xml_data: str, evtx_path: Path, ctx: ScriptContext) -> Optional[
 def main() -> None:
     ensure_dependencies()
     ctx = load_context()
-    writer = ChunkedJSONLWriter(ctx.output_dir, base_name="evtx_events")
+    writer = BackgroundWriter(ChunkedJSONLWriter(ctx.output_dir, base_name="evtx_events"))
     total_records = 0
-    files = 0
-    for evtx_path in discover_evtx_files(ctx.evidence_path):
-        files += 1
-        for event in parse_evtx_file(evtx_path, ctx):
-            writer.write(event)
-            total_records += 1
-    writer.close()
-    logger.info("Fichiers EVTX traités: %d", files)
+    paths = discover_evtx_files(ctx.evidence_path)
+    try:
+        for prefix, events in iter_parsed_files(paths, ctx, EVTX_WORKERS):
+            for batch in iter_batches(events):
+                writer.put(prefix, batch)
+                total_records += len(batch)
+    finally:
+        writer.close()
+    logger.info("Fichiers EVTX traités: %d", len(paths))
     logger.info("Événements exportés: %d", total_records)
 
 
@@ -2,23 +2,65 @@
 """Orchestre l'exécution de Hayabusa sur des fichiers EVTX."""
 from __future__ import annotations
 
+import errno
+import io
 import json
 import logging
 import os
 import platform
+import queue
 import shlex
 import shutil
 import subprocess
 import tarfile
+import tempfile
+import threading
+import time
+import urllib.error
 import urllib.request
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterator, Optional, Tuple
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 
-import csv
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows : pas de reflink
+    fcntl = None  # type: ignore
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - tableaux JSON chargés en mémoire
+    ijson = None  # type: ignore
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - repli sur la bibliothèque standard
+    orjson = None  # type: ignore
 
 MAX_LINES_PER_FILE = int(os.getenv("MAX_LINES_PER_FILE", "100000"))
+# Blocs en attente pour le thread d'écriture (borne la mémoire si le disque ralentit)
+WRITE_QUEUE_DEPTH = 4
+HAYABUSA_STAGE_WORKERS = max(
+    1, int(os.getenv("HAYABUSA_STAGE_WORKERS", "0")) or min(32, (os.cpu_count() or 1) * 4)
+)
+# FICLONE (linux/fs.h) : clone copy-on-write d'un fichier entier (btrfs, XFS...)
+FICLONE = 0x40049409
+STAGE_MODES = ("link", "reflink", "copy")
+HAYABUSA_AUTO_DOWNLOAD = os.getenv("HAYABUSA_AUTO_DOWNLOAD", "1").lower() in {"1", "true", "yes"}
+HAYABUSA_STREAM = os.getenv("HAYABUSA_STREAM", "0").lower() in {"1", "true", "yes"}
+HAYABUSA_WRITE_BUF = max(io.DEFAULT_BUFFER_SIZE, int(os.getenv("HAYABUSA_WRITE_BUF", str(4 * 1024 * 1024))))
+# Taille (en octets) accumulée avant un write() groupé : seul tampon d'écriture des JSONL
+WRITE_FLUSH_THRESHOLD = HAYABUSA_WRITE_BUF
+HTTP_CHUNK_SIZE = 1 << 20
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.3
+# Archive Hayabusa gardée en mémoire jusqu'à cette taille, sur disque au-delà
+ARCHIVE_SPOOL_SIZE = 128 * 1024 * 1024
+RAW_OUTPUT_NAME = "hayabusa_raw.jsonl"
+RELEASE_CACHE_NAME = "release.json"
+RELEASE_CACHE_TTL = 7 * 24 * 3600
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger("hayabusa_runner")
@@ -39,7 +81,62 @@ class ScriptContext:
     output_dir: Path
 
 
+def encode_line(obj: Dict, suffix: Optional[bytes] = None, tail: Optional[Dict] = None) -> bytes:
+    """Sérialise ``obj`` en une ligne JSONL UTF-8 (orjson si disponible).
+
+    ``suffix`` contient des champs déjà encodés (voir ``encode_fields``), placés après ceux
+    de ``obj`` ; ``tail`` est encodé à leur suite. L'ordre des clés reste celui d'origine :
+    champs Hayabusa, contexte Requiem puis ``@timestamp`` dérivé.
+    """
+    if orjson is not None:
+        line = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+    if suffix is None:
+        return line
+    if tail:
+        suffix += b"," + encode_fields(tail)
+    if not obj:
+        return b"{" + suffix + b"}\n"
+    return line[:-2] + b"," + suffix + b"}\n"
+
+
+def encode_fields(fields: Dict) -> bytes:
+    """Pré-encode des champs (membres JSON sans accolades), à réutiliser pour chaque ligne."""
+    return encode_line(fields)[1:-2]
+
+
+CONTEXT_FIELDS = ("case_id", "evidence_uid", "source")
+# Champs horodatage reconnus, par ordre de préférence pour @timestamp
+TIMESTAMP_CANDIDATES = ("@timestamp", "timestamp", "Timestamp", "event_time", "EventTime")
+
+
+def findings_context(ctx: ScriptContext) -> Dict[str, Optional[str]]:
+    return {"case_id": ctx.case_id, "evidence_uid": ctx.evidence_uid, "source": "hayabusa"}
+
+
+def decode_json(data: bytes):
+    """Désérialise un document JSON (orjson si disponible)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_all(fh, data: bytes) -> None:
+    """Écrit ``data`` en entier sur un fichier non tamponné (write() peut être partiel)."""
+    view = memoryview(data)
+    while view:
+        view = view[fh.write(view):]
+
+
 class ChunkedJSONLWriter:
+    """Écrit des objets JSON dans plusieurs fichiers si nécessaire.
+
+    La conversion (lecture, construction des événements, encodage) reste dans le thread
+    appelant ; les blocs encodés sont écrits par un thread d'E/S dédié, dans l'ordre, via
+    une file bornée. Une erreur d'écriture est relancée à l'appel suivant ou au ``close``.
+    """
+
     def __init__(self, output_dir: Path, base_name: str, max_lines: int = MAX_LINES_PER_FILE) -> None:
         self.output_dir = output_dir
         self.base_name = base_name
@@ -48,28 +145,85 @@ class ChunkedJSONLWriter:
         self._line_count = 0
         self._fh = None
         self._current_path: Optional[Path] = None
+        self._buf: List[bytes] = []
+        self._buf_bytes = 0
+        self._io_queue: "queue.Queue[Optional[Tuple[object, Optional[bytes]]]]" = queue.Queue(
+            maxsize=WRITE_QUEUE_DEPTH
+        )
+        self._io_thread: Optional[threading.Thread] = None
+        self._io_error: Optional[BaseException] = None
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def _io_loop(self) -> None:
+        while True:
+            item = self._io_queue.get()
+            if item is None:
+                return
+            if self._io_error is not None:
+                continue  # on vide la file pour ne pas bloquer le producteur
+            fh, data = item
+            try:
+                if data is None:
+                    fh.close()
+                else:
+                    write_all(fh, data)
+            except BaseException as exc:
+                self._io_error = exc
+
+    def _submit(self, fh, data: Optional[bytes]) -> None:
+        """Confie l'écriture de ``data`` (ou la fermeture si None) au thread d'E/S."""
+        if self._io_error is not None:
+            raise self._io_error
+        if self._io_thread is None:
+            self._io_thread = threading.Thread(target=self._io_loop, name="jsonl-writer", daemon=True)
+            self._io_thread.start()
+        self._io_queue.put((fh, data))
+
+    def _flush_buffer(self) -> None:
+        if self._buf:
+            self._submit(self._fh, b"".join(self._buf))
+            self._buf.clear()
+        self._buf_bytes = 0
+
     def _open_next_file(self) -> None:
         if self._fh:
-            self._fh.close()
+            self._flush_buffer()
+            self._submit(self._fh, None)
         filename = f"{self.base_name}_{self._file_index:05d}.jsonl"
         self._current_path = self.output_dir / filename
-        self._fh = self._current_path.open("w", encoding="utf-8")
+        # Les blocs sont déjà regroupés (WRITE_FLUSH_THRESHOLD) : pas de second tampon
+        self._fh = open(self._current_path, "wb", buffering=0)
         self._line_count = 0
         self._file_index += 1
         logger.debug("Création du fichier %s", filename)
 
     def write(self, obj: Dict) -> None:
+        self._append(encode_line(obj))
+
+    def write_with_suffix(self, body: Dict, suffix: bytes, tail: Optional[Dict] = None) -> None:
+        """Écrit ``body`` suivi des champs pré-encodés de ``suffix`` puis de ``tail``."""
+        self._append(encode_line(body, suffix, tail))
+
+    def _append(self, line: bytes) -> None:
         if not self._fh or self._line_count >= self.max_lines:
             self._open_next_file()
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._buf.append(line)
+        self._buf_bytes += len(line)
         self._line_count += 1
+        if self._buf_bytes >= WRITE_FLUSH_THRESHOLD:
+            self._flush_buffer()
 
     def close(self) -> None:
         if self._fh:
-            self._fh.close()
+            self._flush_buffer()
+            self._submit(self._fh, None)
             self._fh = None
+        if self._io_thread is not None:
+            self._io_queue.put(None)
+            self._io_thread.join()
+            self._io_thread = None
+        if self._io_error is not None:
+            raise self._io_error
 
 
 def load_context() -> ScriptContext:
@@ -87,18 +241,56 @@ def load_context() -> ScriptContext:
     return ctx
 
 
+def walk_files(root: Path) -> Iterator[os.DirEntry]:
+    """Parcourt ``root`` avec os.scandir (sans suivre les liens de répertoires).
+
+    Le type de chaque entrée provient de readdir : seuls les liens symboliques
+    nécessitent un stat() supplémentaire.
+    """
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as exc:
+            logger.debug("Répertoire illisible %s: %s", directory, exc)
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+                except OSError:
+                    continue
+
+
 def discover_evtx(root: Path) -> Iterator[Path]:
-    for path in root.rglob("*.evtx"):
-        if path.is_file():
-            yield path
+    for entry in walk_files(root):
+        if entry.name.endswith(".evtx"):
+            yield Path(entry.path)
+
 
+def count_evtx_only(root: Path) -> int:
+    """Nombre d'EVTX sous ``root`` si la preuve ne contient que des EVTX, 0 sinon."""
+    if not root.is_dir():
+        return 0
+    count = 0
+    for entry in walk_files(root):
+        if not entry.name.endswith(".evtx"):
+            return 0
+        count += 1
+    return count
 
-def hayabusa_output_format() -> str:
+
+def check_output_format() -> None:
+    """Seule la timeline JSON est produite ; ``HAYABUSA_OUTPUT`` n'est plus que vérifié."""
     fmt = os.getenv("HAYABUSA_OUTPUT", "json").lower()
-    if fmt not in {"json", "jsonl", "json-timeline", "csv"}:
+    if fmt == "csv":
+        logger.warning("HAYABUSA_OUTPUT=csv n'est plus supporté, utilisation de la timeline JSON")
+    elif fmt not in {"json", "jsonl", "json-timeline"}:
         logger.warning("Format %s inconnu, utilisation de json", fmt)
-        fmt = "json"
-    return fmt
 
 
 def clean_directory(path: Path) -> None:
@@ -133,22 +325,64 @@ def get_platform_info() -> Tuple[str, str]:
     return os_name, arch
 
 
-def get_hayabusa_download_url(version: str = "latest") -> Tuple[str, str]:
-    """Récupère l'URL de téléchargement de Hayabusa pour la plateforme actuelle."""
-    os_name, arch = get_platform_info()
+# Opener partagé par l'appel API et le téléchargement de l'asset
+HTTP_OPENER = urllib.request.build_opener()
+HTTP_OPENER.addheaders = [("User-Agent", "requiem-hayabusa-runner")]
+
 
-    # URL de base pour les releases GitHub
+def http_open(url: str, timeout: float = 30, headers: Optional[Dict[str, str]] = None):
+    """Ouvre ``url`` via l'opener partagé, en réessayant sur erreur réseau ou 5xx."""
+    request = urllib.request.Request(url, headers=headers or {})
+    for attempt in range(HTTP_RETRIES - 1):
+        try:
+            return HTTP_OPENER.open(request, timeout=timeout)
+        except urllib.error.HTTPError as exc:
+            if exc.code < 500:
+                raise
+            logger.debug("HTTP %d sur %s, nouvelle tentative", exc.code, url)
+        except urllib.error.URLError as exc:
+            logger.debug("Erreur réseau sur %s (%s), nouvelle tentative", url, exc.reason)
+        time.sleep(HTTP_BACKOFF * (2 ** attempt))
+    return HTTP_OPENER.open(request, timeout=timeout)
+
+
+def download_to(url: str, out: BinaryIO) -> None:
+    """Télécharge ``url`` dans ``out`` par blocs de HTTP_CHUNK_SIZE en journalisant la progression."""
+    with http_open(url, timeout=60) as response:
+        total_size = int(response.headers.get("Content-Length") or 0)
+        downloaded = 0
+        next_report = 10
+        while True:
+            chunk = response.read(HTTP_CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+            downloaded += len(chunk)
+            if total_size > 0:
+                percent = min(100, downloaded * 100 // total_size)
+                if percent >= next_report:
+                    logger.info("Téléchargement: %d%% (%d MB / %d MB)",
+                                percent, downloaded // (1024 * 1024), total_size // (1024 * 1024))
+                    next_report = percent - percent % 10 + 10
+
+
+def release_api_url(version: str) -> str:
     if version == "latest":
-        api_url = "https://api.github.com/repos/Yamato-Security/hayabusa/releases/latest"
-    else:
-        api_url = f"https://api.github.com/repos/Yamato-Security/hayabusa/releases/tags/{version}"
+        return "https://api.github.com/repos/Yamato-Security/hayabusa/releases/latest"
+    return f"https://api.github.com/repos/Yamato-Security/hayabusa/releases/tags/{version}"
 
-    logger.info("Récupération des informations de release Hayabusa depuis GitHub...")
 
+def fetch_release(version: str, etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """Interroge l'API GitHub ; renvoie ``(None, etag)`` si la release n'a pas changé (304)."""
+    headers = {"Accept": "application/vnd.github+json"}
+    if etag:
+        headers["If-None-Match"] = etag
     try:
-        with urllib.request.urlopen(api_url, timeout=30) as response:
-            release_data = json.loads(response.read().decode())
+        with http_open(release_api_url(version), timeout=30, headers=headers) as response:
+            return decode_json(response.read()), response.headers.get("ETag")
     except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None, etag
         if exc.code == 404:
             raise SystemExit(f"Version Hayabusa '{version}' introuvable sur GitHub") from exc
         raise SystemExit(f"Erreur HTTP {exc.code} lors de la récupération de la release: {exc}") from exc
@@ -157,6 +391,11 @@ def get_hayabusa_download_url(version: str = "latest") -> Tuple[str, str]:
     except Exception as exc:
         raise SystemExit(f"Erreur inattendue lors de la récupération de la release: {exc}") from exc
 
+
+def select_release_asset(release_data: Dict, version: str) -> Tuple[str, str]:
+    """Choisit l'archive de la release correspondant à la plateforme actuelle."""
+    os_name, arch = get_platform_info()
+
     # Hayabusa utilise "aarch64" au lieu de "arm64" dans les noms de fichiers
     hayabusa_arch = "aarch64" if arch == "arm64" else arch
 
@@ -192,95 +431,282 @@ def get_hayabusa_download_url(version: str = "latest") -> Tuple[str, str]:
     )
 
 
-def download_and_extract_hayabusa(download_dir: Path) -> Path:
-    """Télécharge et extrait Hayabusa, retourne le chemin du binaire."""
-    download_dir.mkdir(parents=True, exist_ok=True)
+def get_hayabusa_download_url(version: str = "latest") -> Tuple[str, str]:
+    """Récupère l'URL de téléchargement de Hayabusa pour la plateforme actuelle."""
+    logger.info("Récupération des informations de release Hayabusa depuis GitHub...")
+    release_data, _ = fetch_release(version)
+    return select_release_asset(release_data, version)
 
-    # Vérifier si déjà téléchargé
-    os_name, _ = get_platform_info()
-    binary_name = "hayabusa.exe" if os_name == "windows" else "hayabusa"
 
-    # Chercher le binaire dans le répertoire de téléchargement
+def find_cached_binary(download_dir: Path, binary_name: str) -> Optional[Path]:
     for candidate in download_dir.rglob(binary_name):
         if candidate.is_file():
-            logger.info("Binaire Hayabusa déjà présent: %s", candidate)
-            # S'assurer qu'il est exécutable sur Unix
-            if os_name != "windows":
-                candidate.chmod(0o755)
             return candidate
+    return None
+
+
+def ensure_executable(binary: Path, os_name: str) -> Path:
+    # S'assurer qu'il est exécutable sur Unix
+    if os_name != "windows":
+        binary.chmod(0o755)
+    return binary
+
+
+def load_release_cache(cache_path: Path) -> Dict:
+    try:
+        data = decode_json(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_release_cache(cache_path: Path, metadata: Dict) -> None:
+    """Écrit les métadonnées de release ; la date de modification sert de date de vérification."""
+    try:
+        cache_path.write_bytes(encode_line(metadata))
+    except OSError as exc:
+        logger.debug("Cache de release non écrit (%s): %s", cache_path, exc)
+
+
+def release_cache_is_fresh(cache_path: Path, metadata: Dict, version: str) -> bool:
+    if metadata.get("version") != version:
+        return False
+    if version != "latest":
+        return True  # un tag publié ne change pas
+    try:
+        age = time.time() - cache_path.stat().st_mtime
+    except OSError:
+        return False
+    return age < RELEASE_CACHE_TTL
+
+
+def download_release(release_data: Dict, version: str, dest: Path) -> None:
+    """Télécharge l'archive de la release pour cette plateforme et l'extrait dans ``dest``."""
+    download_url, filename = select_release_asset(release_data, version)
+    if not filename.endswith((".zip", ".tar.gz", ".tgz")):
+        raise SystemExit(f"Format d'archive non supporté: {filename}")
+
+    # L'archive n'est pas écrite dans le cache : elle est extraite depuis un fichier
+    # temporaire en mémoire (sur disque seulement au-delà de ARCHIVE_SPOOL_SIZE)
+    with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE) as archive:
+        logger.info("Téléchargement de Hayabusa depuis: %s", download_url)
+        try:
+            download_to(download_url, archive)
+            logger.info("Téléchargement terminé: %s", filename)
+        except urllib.error.HTTPError as exc:
+            raise SystemExit(f"Erreur HTTP {exc.code} lors du téléchargement: {exc}") from exc
+        except urllib.error.URLError as exc:
+            raise SystemExit(f"Échec du téléchargement (connexion): {exc}") from exc
+        except Exception as exc:
+            raise SystemExit(f"Échec du téléchargement: {exc}") from exc
+
+        logger.info("Extraction de %s...", filename)
+        archive.seek(0)
+
+        # Extraire l'archive complète : Hayabusa a besoin de rules/ et config/
+        try:
+            if filename.endswith(".zip"):
+                with zipfile.ZipFile(archive, 'r') as zip_ref:
+                    zip_ref.extractall(dest)
+            else:
+                with tarfile.open(fileobj=archive, mode='r:gz') as tar_ref:
+                    tar_ref.extractall(dest)
+        except Exception as exc:
+            raise SystemExit(f"Échec de l'extraction: {exc}") from exc
+
+
+def replace_directory(src: Path, dst: Path) -> None:
+    """Remplace ``dst`` par ``src`` ; l'ancien contenu n'est supprimé qu'une fois ``src`` en place.
+
+    Si ``dst`` ne peut pas être renommé (point de montage, ex. volume Docker), son contenu
+    est remplacé entrée par entrée.
+    """
+    backup: Optional[Path] = dst.with_name(f".{dst.name}_old_{os.getpid()}")
+    shutil.rmtree(backup, ignore_errors=True)
+    try:
+        dst.rename(backup)
+    except FileNotFoundError:
+        backup = None
+    except OSError:
+        for child in dst.iterdir():
+            if child.is_dir() and not child.is_symlink():
+                shutil.rmtree(child)
+            else:
+                child.unlink()
+        for child in src.iterdir():
+            shutil.move(str(child), str(dst / child.name))
+        src.rmdir()
+        return
+    try:
+        src.rename(dst)
+    except OSError:
+        if backup is not None:
+            backup.rename(dst)
+        raise
+    if backup is not None:
+        shutil.rmtree(backup, ignore_errors=True)
+
+
+def download_and_extract_hayabusa(download_dir: Path) -> Path:
+    """Télécharge et extrait Hayabusa, retourne le chemin du binaire.
+
+    ``release.json`` (version demandée, tag, ETag) accompagne le binaire en cache : tant
+    qu'il est récent, aucun appel réseau n'est fait ; ensuite la release est revalidée
+    par requête conditionnelle (304 si inchangée), avec repli sur le cache hors ligne.
+    """
+    download_dir.mkdir(parents=True, exist_ok=True)
 
-    # Télécharger la release
+    os_name, _ = get_platform_info()
+    binary_name = "hayabusa.exe" if os_name == "windows" else "hayabusa"
     version = os.getenv("HAYABUSA_VERSION", "latest")
-    download_url, filename = get_hayabusa_download_url(version)
-    download_path = download_dir / filename
+    cache_path = download_dir / RELEASE_CACHE_NAME
+    metadata = load_release_cache(cache_path)
+
+    # Vérifier si déjà téléchargé
+    cached = find_cached_binary(download_dir, binary_name)
+    if cached is not None:
+        if release_cache_is_fresh(cache_path, metadata, version):
+            logger.info("Binaire Hayabusa déjà présent: %s", cached)
+            return ensure_executable(cached, os_name)
+        etag = metadata.get("etag") if metadata.get("version") == version else None
+        logger.info("Vérification de la release Hayabusa %s sur GitHub...", version)
+        try:
+            release_data, etag = fetch_release(version, etag)
+        except SystemExit as exc:
+            logger.warning("%s ; utilisation du binaire en cache %s", exc, cached)
+            return ensure_executable(cached, os_name)
+        if release_data is None or release_data.get("tag_name") == metadata.get("tag"):
+            save_release_cache(cache_path, {**metadata, "version": version, "etag": etag})
+            logger.info("Binaire Hayabusa à jour: %s", cached)
+            return ensure_executable(cached, os_name)
+        logger.info("Nouvelle release Hayabusa %s, remplacement du cache", release_data.get("tag_name"))
+    else:
+        logger.info("Récupération des informations de release Hayabusa depuis GitHub...")
+        release_data, etag = fetch_release(version)
 
-    logger.info("Téléchargement de Hayabusa depuis: %s", download_url)
+    # Extraction à côté du cache : le binaire en place n'est remplacé qu'une fois la
+    # nouvelle release extraite et son binaire trouvé
+    extract_dir = Path(tempfile.mkdtemp(prefix=f".{download_dir.name}_", dir=download_dir.parent))
     try:
-        def show_progress(block_num, block_size, total_size):
-            if total_size > 0:
-                downloaded = block_num * block_size
-                percent = min(100, downloaded * 100 // total_size)
-                if block_num % 100 == 0 or downloaded >= total_size:
-                    logger.info("Téléchargement: %d%% (%d MB / %d MB)",
-                               percent, downloaded // (1024*1024), total_size // (1024*1024))
+        download_release(release_data, version, extract_dir)
+        if find_cached_binary(extract_dir, binary_name) is None:
+            raise SystemExit(f"Binaire {binary_name} introuvable après extraction")
+    except SystemExit as exc:
+        shutil.rmtree(extract_dir, ignore_errors=True)
+        if cached is None:
+            raise
+        logger.warning("%s ; utilisation du binaire en cache %s", exc, cached)
+        return ensure_executable(cached, os_name)
+    replace_directory(extract_dir, download_dir)
+
+    candidate = find_cached_binary(download_dir, binary_name)
+    if candidate is None:
+        raise SystemExit(f"Binaire {binary_name} introuvable après extraction")
+    ensure_executable(candidate, os_name)
+    logger.info("Binaire Hayabusa extrait: %s", candidate)
+    save_release_cache(
+        cache_path,
+        {"version": version, "tag": release_data.get("tag_name"), "etag": etag, "binary": str(candidate)},
+    )
+    return candidate
 
-        urllib.request.urlretrieve(download_url, download_path, reporthook=show_progress)
-        logger.info("Téléchargement terminé: %s", download_path)
-    except urllib.error.HTTPError as exc:
-        raise SystemExit(f"Erreur HTTP {exc.code} lors du téléchargement: {exc}") from exc
-    except urllib.error.URLError as exc:
-        raise SystemExit(f"Échec du téléchargement (connexion): {exc}") from exc
-    except Exception as exc:
-        raise SystemExit(f"Échec du téléchargement: {exc}") from exc
 
-    logger.info("Extraction de %s...", filename)
+def hayabusa_stage_mode() -> str:
+    mode = os.getenv("HAYABUSA_STAGE_MODE", "link").lower()
+    if mode not in STAGE_MODES:
+        logger.warning("Mode de staging %s inconnu, utilisation de link", mode)
+        mode = "link"
+    return mode
+
+
+def reflink_file(src: Path, dst: Path) -> None:
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink non supporté sur cette plateforme")
+    with src.open("rb") as src_fh, dst.open("wb") as dst_fh:
+        fcntl.ioctl(dst_fh.fileno(), FICLONE, src_fh.fileno())
+    shutil.copystat(src, dst)
+
+
+def copy_file_range_copy(src: Path, dst: Path) -> None:
+    """Copie intégralement dans le noyau (copy_file_range), sans tampon utilisateur.
+
+    Les métadonnées (mtime...) ne sont pas reportées : Hayabusa n'en a pas besoin.
+    """
+    with src.open("rb") as src_fh, dst.open("wb") as dst_fh:
+        src_fd, dst_fd = src_fh.fileno(), dst_fh.fileno()
+        remaining = os.fstat(src_fd).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src_fd, dst_fd, remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    if hasattr(os, "copy_file_range"):
+        try:
+            copy_file_range_copy(src, dst)
+            return
+        except OSError as exc:
+            logger.debug("copy_file_range impossible pour %s (%s), copie classique", src, exc)
+    shutil.copy2(src, dst)
+
 
-    # Extraire l'archive
+def place_file(src: Path, dst: Path, mode: str) -> None:
+    """Place ``src`` en ``dst`` sans copie si possible : lien dur, puis reflink, puis copie."""
+    if mode == "link":
+        try:
+            os.link(src, dst)
+            return
+        except OSError as exc:
+            logger.debug("Lien dur impossible pour %s (%s)", src, exc)
+    if mode in ("link", "reflink"):
+        try:
+            reflink_file(src, dst)
+            return
+        except OSError as exc:
+            logger.debug("Reflink impossible pour %s (%s), copie", src, exc)
+    copy_file(src, dst)
+
+
+def stage_one(src: Path, evidence_root: Path, staging_dir: Path, mode: str) -> bool:
     try:
-        if filename.endswith(".zip"):
-            with zipfile.ZipFile(download_path, 'r') as zip_ref:
-                zip_ref.extractall(download_dir)
-        elif filename.endswith(".tar.gz") or filename.endswith(".tgz"):
-            with tarfile.open(download_path, 'r:gz') as tar_ref:
-                tar_ref.extractall(download_dir)
-        else:
-            raise SystemExit(f"Format d'archive non supporté: {filename}")
+        rel_path = src.relative_to(evidence_root)
+    except ValueError:
+        rel_path = Path(src.name)
+    dst = staging_dir / rel_path
+    try:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        place_file(src, dst, mode)
     except Exception as exc:
-        raise SystemExit(f"Échec de l'extraction: {exc}") from exc
+        logger.warning("Impossible de copier %s: %s", src, exc)
+        return False
+    return True
 
-    # Chercher le binaire extrait
-    for candidate in download_dir.rglob(binary_name):
-        if candidate.is_file():
-            # Rendre exécutable sur Unix
-            if os_name != "windows":
-                candidate.chmod(0o755)
-            logger.info("Binaire Hayabusa extrait: %s", candidate)
-            # Nettoyer l'archive
-            try:
-                download_path.unlink()
-            except OSError:
-                pass
-            return candidate
 
-    raise SystemExit(f"Binaire {binary_name} introuvable après extraction")
+def file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
 
+def stage_evtx_files(ctx: ScriptContext, staging_dir: Path, mode: str) -> int:
+    """Prépare les EVTX dans ``staging_dir`` en parallèle (les copies libèrent le GIL).
 
-def stage_evtx_files(ctx: ScriptContext, staging_dir: Path) -> int:
+    Les plus gros fichiers sont traités en premier : leur copie démarre tôt et ils sont
+    créés en tête du répertoire, ce qui limite la traîne d'un gros Security.evtx.
+    """
     clean_directory(staging_dir)
+    sources = sorted(discover_evtx(ctx.evidence_path), key=file_size, reverse=True)
+    if not sources:
+        return 0
     count = 0
-    for src in discover_evtx(ctx.evidence_path):
-        try:
-            rel_path = src.relative_to(ctx.evidence_path)
-        except ValueError:
-            rel_path = Path(src.name)
-        dst = staging_dir / rel_path
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            shutil.copy2(src, dst)
-        except Exception as exc:
-            logger.warning("Impossible de copier %s: %s", src, exc)
-            continue
-        count += 1
+    with ThreadPoolExecutor(max_workers=min(HAYABUSA_STAGE_WORKERS, len(sources))) as executor:
+        futures = [executor.submit(stage_one, src, ctx.evidence_path, staging_dir, mode) for src in sources]
+        for future in as_completed(futures):
+            if future.result():
+                count += 1
     return count
 
 
@@ -304,18 +730,15 @@ def resolve_hayabusa_binary() -> str:
         return "hayabusa"
 
     # Télécharger Hayabusa automatiquement
+    if not HAYABUSA_AUTO_DOWNLOAD:
+        raise SystemExit("Hayabusa introuvable (HAYABUSA_BIN, PATH) et téléchargement automatique désactivé")
     logger.info("Hayabusa non trouvé, téléchargement automatique...")
     download_dir = Path.home() / ".cache" / "requiem" / "hayabusa"
     binary_path = download_and_extract_hayabusa(download_dir)
     return str(binary_path)
 
 
-def run_hayabusa(staging_dir: Path, ctx: ScriptContext, output_format: str) -> Path:
-    binary = resolve_hayabusa_binary()
-    if output_format == "csv":
-        result_path = ctx.output_dir / "hayabusa_raw.csv"
-    else:
-        result_path = ctx.output_dir / "hayabusa_raw.jsonl"
+def hayabusa_command(binary: str, staging_dir: Path, result_path: Path) -> List[str]:
     cmd = [
         binary,
         "evtx",
@@ -324,17 +747,21 @@ def run_hayabusa(staging_dir: Path, ctx: ScriptContext, output_format: str) -> P
         str(staging_dir),
         "-o",
         str(result_path),
+        "--json-timeline",
     ]
-    if output_format == "csv":
-        cmd.append("--csv")
-    else:
-        cmd.append("--json-timeline")
     ruleset = os.getenv("HAYABUSA_RULESET")
     if ruleset:
         cmd.extend(["-r", ruleset])
     extra = os.getenv("HAYABUSA_ARGS")
     if extra:
         cmd.extend(shlex.split(extra))
+    return cmd
+
+
+def run_hayabusa(staging_dir: Path, ctx: ScriptContext) -> Path:
+    binary = resolve_hayabusa_binary()
+    result_path = ctx.output_dir / RAW_OUTPUT_NAME
+    cmd = hayabusa_command(binary, staging_dir, result_path)
     logger.info("Commande Hayabusa: %s", " ".join(cmd))
     try:
         subprocess.run(cmd, check=True)
@@ -345,30 +772,141 @@ def run_hayabusa(staging_dir: Path, ctx: ScriptContext, output_format: str) -> P
     return result_path
 
 
-def normalize_row(row: Dict[str, str]) -> Dict[str, Optional[str]]:
-    normalized: Dict[str, Optional[str]] = {}
-    for key, value in row.items():
-        if isinstance(value, str):
-            normalized[key] = value if value.strip() else None
-        else:
-            normalized[key] = value
-    return normalized
+def release_fifo_reader(fifo: Path) -> None:
+    """Débloque un lecteur encore en attente sur ``fifo`` (EOF immédiat)."""
+    try:
+        fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        return  # aucun lecteur : rien à débloquer
+    os.close(fd)
 
 
-def iter_json_timeline(json_path: Path) -> Iterator[Dict]:
+def stream_hayabusa(staging_dir: Path, ctx: ScriptContext) -> None:
+    """Lance Hayabusa en écrivant dans un FIFO converti au fil de l'eau.
+
+    La sortie brute ne transite jamais par le disque. Hayabusa refusant d'écraser un
+    fichier existant, ``--clobber`` est ajouté ; la timeline JSON est demandée en JSONL
+    (``-L``) pour pouvoir être lue en une seule passe.
+    """
+    binary = resolve_hayabusa_binary()
+    fifo_dir = Path(tempfile.mkdtemp(prefix="hayabusa_", dir=ctx.output_dir))
+    fifo = fifo_dir / RAW_OUTPUT_NAME
+    os.mkfifo(fifo, 0o600)
+    cmd = hayabusa_command(binary, staging_dir, fifo)
+    cmd.extend(["--clobber", "-L"])
+    logger.info("Commande Hayabusa (flux): %s", " ".join(cmd))
     try:
-        with json_path.open("r", encoding="utf-8") as handle:
-            for line in handle:
-                stripped = line.strip()
-                if not stripped:
-                    continue
-                yield json.loads(stripped)
-        return
-    except json.JSONDecodeError:
-        logger.debug("JSON Hayabusa non NDJSON, parsing complet requis")
+        try:
+            proc = subprocess.Popen(cmd)
+        except FileNotFoundError:
+            raise SystemExit("Hayabusa n'est pas installé ou inaccessible")
+
+        converted = threading.Event()
+
+        def watch() -> None:
+            # Si Hayabusa se termine sans ouvrir le FIFO, le lecteur resterait bloqué
+            proc.wait()
+            while not converted.wait(0.1):
+                release_fifo_reader(fifo)
 
-    raw = json_path.read_text(encoding="utf-8")
-    data = json.loads(raw)
+        watcher = threading.Thread(target=watch, name="hayabusa-watch", daemon=True)
+        watcher.start()
+        try:
+            json_timeline_to_jsonl(fifo, ctx)
+        finally:
+            converted.set()
+            returncode = proc.wait()
+            watcher.join()
+        if returncode != 0:
+            raise SystemExit(f"Hayabusa a échoué (code {returncode})")
+    finally:
+        shutil.rmtree(fifo_dir, ignore_errors=True)
+
+
+def first_significant_byte(handle) -> bytes:
+    """Premier octet non blanc du flux, sans le consommer (fonctionne aussi sur un FIFO)."""
+    while True:
+        chunk = handle.peek(64)
+        if not chunk:
+            return b""
+        stripped = chunk.lstrip()
+        if stripped:
+            return stripped[:1]
+        handle.read(len(chunk))  # uniquement des blancs : sans importance
+
+
+def iter_json_objects(handle) -> Iterator[Dict]:
+    """Lit du NDJSON ou des objets indentés concaténés (sortie par défaut de Hayabusa) en une passe."""
+    pending: List[bytes] = []
+    for line in handle:
+        if not pending:
+            # Lignes vides (\n ou \r\n) ; les décodeurs JSON tolèrent le saut de ligne final
+            if len(line) <= 2 and not line.strip():
+                continue
+            try:
+                yield decode_json(line)
+                continue
+            except json.JSONDecodeError:
+                pass
+            if line.strip() == b"{":
+                # Ouverture d'un objet indenté : accumulé jusqu'à son accolade fermante
+                pending.append(line)
+            else:
+                # Ligne NDJSON invalide (ou objets collés sur une ligne) : seule cette ligne est perdue
+                yield from iter_concatenated(line)
+            continue
+        pending.append(line)
+        # Un objet indenté se termine par une accolade en première colonne
+        if line[:1] != b"}":
+            continue
+        try:
+            obj = decode_json(b"".join(pending))
+        except json.JSONDecodeError:
+            continue
+        pending.clear()
+        yield obj
+    if pending:
+        yield from iter_concatenated(b"".join(pending))
+
+
+def iter_concatenated(data: bytes) -> Iterator[Dict]:
+    """Dernier recours : documents JSON juxtaposés sans séparateur de ligne exploitable."""
+    decoder = json.JSONDecoder()
+    text = data.decode("utf-8", errors="replace")
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text):
+            return
+        try:
+            obj, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as exc:
+            logger.warning("JSON Hayabusa tronqué ou invalide, reste du bloc ignoré: %s", exc)
+            return
+        yield obj
+
+
+def iter_json_timeline(json_path: Path) -> Iterator[Dict]:
+    """Itère les événements de la sortie JSON de Hayabusa sans relire le fichier.
+
+    Le premier octet significatif choisit la stratégie : ``[`` pour un tableau (lu de
+    façon incrémentale avec ijson s'il est installé), ``{`` pour du NDJSON ou des
+    objets concaténés.
+    """
+    with json_path.open("rb") as handle:
+        first = first_significant_byte(handle)
+        if first == b"{":
+            yield from iter_json_objects(handle)
+            return
+        if first == b"[" and ijson is not None:
+            for item in ijson.items(handle, "item", use_float=True):
+                if isinstance(item, dict):
+                    yield item
+            return
+        if not first:
+            return
+        data = decode_json(handle.read())
     if isinstance(data, list):
         for item in data:
             if isinstance(item, dict):
@@ -379,51 +917,30 @@ def iter_json_timeline(json_path: Path) -> Iterator[Dict]:
         logger.warning("Format JSON inattendu (%s), ignoré", type(data).__name__)
 
 
-def csv_to_jsonl(csv_path: Path, ctx: ScriptContext) -> None:
-    writer = ChunkedJSONLWriter(ctx.output_dir, base_name="hayabusa_findings")
-    total = 0
-    candidates = ("@timestamp", "timestamp", "Timestamp", "event_time", "EventTime")
-    with csv_path.open("r", encoding="utf-8-sig", newline="") as handle:
-        reader = csv.DictReader(handle)
-        if not reader.fieldnames:
-            logger.warning("CSV Hayabusa vide: %s", csv_path)
-            writer.close()
-            return
-        for row in reader:
-            normalized = normalize_row(row)
-            event: Dict[str, Optional[str]] = {
-                "case_id": ctx.case_id,
-                "evidence_uid": ctx.evidence_uid,
-                "source": "hayabusa",
-            }
-            for candidate in candidates:
-                if candidate in normalized and normalized[candidate]:
-                    event["@timestamp"] = normalized.get(candidate)
-                    break
-            event.update({k: v for k, v in normalized.items() if v is not None})
-            writer.write(event)
-            total += 1
-    writer.close()
-    logger.info("Entrées Hayabusa converties: %d", total)
-
-
 def json_timeline_to_jsonl(json_path: Path, ctx: ScriptContext) -> None:
     writer = ChunkedJSONLWriter(ctx.output_dir, base_name="hayabusa_findings")
     total = 0
-    candidates = ("@timestamp", "timestamp", "Timestamp", "event_time", "EventTime")
+    context = findings_context(ctx)
+    suffix = encode_fields(context)
     for record in iter_json_timeline(json_path):
         if not isinstance(record, dict):
             continue
-        event = dict(record)
-        event["case_id"] = ctx.case_id
-        event["evidence_uid"] = ctx.evidence_uid
-        event["source"] = "hayabusa"
-        if "@timestamp" not in event:
-            for candidate in candidates:
-                if candidate in event and event[candidate]:
-                    event["@timestamp"] = event[candidate]
-                    break
-        writer.write(event)
+        tail = None
+        if "@timestamp" not in record:
+            timestamp = next(
+                (value for value in map(record.get, TIMESTAMP_CANDIDATES[1:]) if value), None
+            )
+            if timestamp:
+                tail = {"@timestamp": timestamp}
+        if any(name in record for name in CONTEXT_FIELDS):
+            # champs de contexte déjà présents : mis à jour à leur place d'origine
+            record.update(context)
+            if tail:
+                record.update(tail)
+            writer.write(record)
+        else:
+            # record est fraîchement décodé : il sert de corps sans copie
+            writer.write_with_suffix(record, suffix, tail)
         total += 1
     writer.close()
     logger.info("Entrées JSON Hayabusa converties: %d", total)
@@ -431,23 +948,36 @@ def json_timeline_to_jsonl(json_path: Path, ctx: ScriptContext) -> None:
 
 def main() -> None:
     ctx = load_context()
-    staging_dir = ctx.output_dir / "evtx"
-    file_count = stage_evtx_files(ctx, staging_dir)
-    if file_count == 0:
-        raise SystemExit("Aucun fichier EVTX trouvé dans la preuve")
-    logger.info("Fichiers EVTX copiés: %d", file_count)
-    output_format = hayabusa_output_format()
-    raw_path = run_hayabusa(staging_dir, ctx, output_format)
-    logger.info("Sortie Hayabusa générée: %s", raw_path)
-    if output_format == "csv":
-        csv_to_jsonl(raw_path, ctx)
+    staging_dir: Optional[Path] = None
+    stage_mode = hayabusa_stage_mode()
+    # reflink/copy imposent une copie indépendante : seul le mode link (défaut) s'en dispense
+    file_count = count_evtx_only(ctx.evidence_path) if stage_mode == "link" else 0
+    if file_count:
+        # Hayabusa ne fait que lire : inutile de préparer une copie d'un répertoire déjà propre
+        input_dir = ctx.evidence_path
+        logger.info("Preuve composée uniquement d'EVTX (%d), analyse directe sans staging", file_count)
+    else:
+        staging_dir = ctx.output_dir / "evtx"
+        input_dir = staging_dir
+        file_count = stage_evtx_files(ctx, staging_dir, stage_mode)
+        if file_count == 0:
+            raise SystemExit("Aucun fichier EVTX trouvé dans la preuve")
+        logger.info("Fichiers EVTX copiés: %d", file_count)
+    check_output_format()
+    if HAYABUSA_STREAM and hasattr(os, "mkfifo"):
+        stream_hayabusa(input_dir, ctx)
     else:
+        if HAYABUSA_STREAM:
+            logger.warning("HAYABUSA_STREAM ignoré : FIFO non supportés sur cette plateforme")
+        raw_path = run_hayabusa(input_dir, ctx)
+        logger.info("Sortie Hayabusa générée: %s", raw_path)
         json_timeline_to_jsonl(raw_path, ctx)
-    try:
-        raw_path.unlink()
-    except OSError:
-        pass
-    shutil.rmtree(staging_dir, ignore_errors=True)
+        try:
+            raw_path.unlink()
+        except OSError:
+            pass
+    if staging_dir is not None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Tests de non-régression de la lecture de la timeline JSON de Hayabusa.
+
+Les formats que la lecture d'origine acceptait (NDJSON, tableau, objet unique) sont
+comparés à une copie de celle-ci ; les formats qu'elle ne savait pas lire (objets
+indentés concaténés, lignes invalides) sont comparés au décodage attendu.
+Lancement : ``python3 test/test_script.py``.
+"""
+
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import script
+
+EVENTS = [
+    {"Timestamp": "2024-01-01 10:00:00.000 +00:00", "RuleTitle": "R0", "Level": "high", "EventID": 4624},
+    {"Timestamp": "2024-01-01 10:00:01.500 +00:00", "RuleTitle": "Règle é", "Details": {"User": "bob", "Port": 445}},
+    {"Timestamp": "", "RuleTitle": "R2", "Score": 0.25, "Tags": ["a", "b"], "Empty": None},
+]
+
+
+def reference_json_timeline(json_path):
+    """Lecture d'origine : NDJSON ligne par ligne, sinon document complet."""
+    try:
+        with json_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                yield json.loads(stripped)
+        return
+    except json.JSONDecodeError:
+        pass
+    data = json.loads(json_path.read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict):
+                yield item
+    elif isinstance(data, dict):
+        yield data
+
+
+def reference_json_to_jsonl(records, ctx):
+    """Construction d'origine des lignes de hayabusa_findings."""
+    candidates = ("@timestamp", "timestamp", "Timestamp", "event_time", "EventTime")
+    for record in records:
+        event = dict(record)
+        event["case_id"] = ctx.case_id
+        event["evidence_uid"] = ctx.evidence_uid
+        event["source"] = "hayabusa"
+        if "@timestamp" not in event:
+            for candidate in candidates:
+                if candidate in event and event[candidate]:
+                    event["@timestamp"] = event[candidate]
+                    break
+        yield event
+
+
+class JsonTimelineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="hayabusa_json_test_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, data, name="timeline.json"):
+        path = self.tmp / name
+        path.write_bytes(data.encode("utf-8") if isinstance(data, str) else data)
+        return path
+
+    def read(self, path):
+        return list(script.iter_json_timeline(path))
+
+    def assert_same_as_reference(self, data):
+        path = self.write(data)
+        self.assertEqual(self.read(path), list(reference_json_timeline(path)))
+
+    def test_ndjson(self):
+        self.assert_same_as_reference("".join(json.dumps(event) + "\n" for event in EVENTS))
+
+    def test_ndjson_crlf_and_blank_lines(self):
+        lines = [json.dumps(event, ensure_ascii=False) for event in EVENTS]
+        self.assert_same_as_reference("\r\n" + "\r\n\r\n".join(lines) + "\r\n\n")
+
+    def test_ndjson_without_final_newline(self):
+        self.assert_same_as_reference("\n".join(json.dumps(event) for event in EVENTS))
+
+    def test_single_pretty_object(self):
+        self.assert_same_as_reference(json.dumps(EVENTS[1], indent=2, ensure_ascii=False) + "\n")
+
+    def test_array(self):
+        data = json.dumps([EVENTS[0], "ignoré", EVENTS[1], EVENTS[2]], indent=2)
+        self.assert_same_as_reference(data)
+
+    def test_array_without_ijson(self):
+        original = script.ijson
+        script.ijson = None
+        try:
+            self.assert_same_as_reference(json.dumps(EVENTS, indent=2))
+        finally:
+            script.ijson = original
+
+    def test_array_on_one_line(self):
+        # La lecture d'origine y voyait une ligne NDJSON et renvoyait la liste entière,
+        # ensuite écartée faute d'être un dict : ses événements étaient perdus
+        self.assertEqual(self.read(self.write(json.dumps(EVENTS))), EVENTS)
+
+    def test_empty_file(self):
+        self.assertEqual(self.read(self.write("")), [])
+        self.assertEqual(self.read(self.write(" \r\n\n")), [])
+
+    def test_concatenated_pretty_objects(self):
+        # Sortie par défaut de Hayabusa : la lecture d'origine échouait sur ce format
+        for newline in ("\n", "\r\n"):
+            data = "".join(
+                json.dumps(event, indent=4, ensure_ascii=False).replace("\n", newline) + newline
+                for event in EVENTS
+            )
+            self.assertEqual(self.read(self.write(data)), EVENTS)
+
+    def test_objects_on_one_line(self):
+        self.assertEqual(self.read(self.write("".join(json.dumps(event) for event in EVENTS))), EVENTS)
+
+    def test_malformed_ndjson_line_is_skipped(self):
+        lines = [json.dumps(event) for event in EVENTS]
+        data = "\n".join([lines[0], '{"RuleTitle": "tronqué', lines[1], "pas du JSON", lines[2]]) + "\n"
+        logging.disable(logging.WARNING)
+        try:
+            self.assertEqual(self.read(self.write(data)), EVENTS)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def test_invalid_utf8_line_is_skipped(self):
+        data = json.dumps(EVENTS[0]).encode() + b"\n\xff\xfe{\n" + json.dumps(EVENTS[1]).encode() + b"\n"
+        logging.disable(logging.WARNING)
+        try:
+            self.assertEqual(self.read(self.write(data)), EVENTS[:2])
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def test_truncated_pretty_object_at_end(self):
+        data = json.dumps(EVENTS[0], indent=2) + "\n" + json.dumps(EVENTS[1], indent=2)[:-10]
+        logging.disable(logging.WARNING)
+        try:
+            self.assertEqual(self.read(self.write(data)), EVENTS[:1])
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def test_findings_jsonl_same_as_reference(self):
+        records = EVENTS + [
+            {"@timestamp": "2024-02-01T00:00:00Z", "RuleTitle": "R3"},
+            {"EventTime": "2024-03-01", "source": "amont", "case_id": "x", "RuleTitle": "R4"},
+            {},
+        ]
+        path = self.write("".join(json.dumps(record) + "\n" for record in records))
+        ctx = script.ScriptContext(case_id="case_001", evidence_uid=None, evidence_path=self.tmp, output_dir=self.tmp / "out")
+        ctx.output_dir.mkdir()
+        script.json_timeline_to_jsonl(path, ctx)
+        lines = []
+        for jsonl in sorted(ctx.output_dir.glob("hayabusa_findings_*.jsonl")):
+            lines.extend(jsonl.read_text(encoding="utf-8").splitlines())
+        decoded = [json.loads(line) for line in lines]
+        expected = list(reference_json_to_jsonl(records, ctx))
+        self.assertEqual(decoded, expected)
+        # L'ordre des clés fait partie de la sortie
+        self.assertEqual([list(event) for event in decoded], [list(event) for event in expected])
+
+
+if __name__ == "__main__":
+    unittest.main()
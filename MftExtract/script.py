@@ -1,12 +1,54 @@
 #!/usr/bin/env python3
 import json
+import keyword
 import os
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback to the standard library
+    orjson = None  # type: ignore
+
 from dissect.target import Target
 
 MAX_LINES_PER_FILE = 100_000
-FLUSH_INTERVAL = 10_000
+PROGRESS_INTERVAL = 10_000
+# Large write buffer: millions of short lines coalesce into few write() syscalls
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# Encoded lines are batched in memory and handed to the file in one write() call
+WRITE_BATCH_LINES = 1024
+if orjson is not None:
+    # datetimes go through default=str like with the json module (no ISO "T")
+    ORJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_PASSTHROUGH_DATETIME
+
+# (output key, attributes probed in order, default when all are missing or None)
+FIELD_SPECS = (
+    ("@timestamp", ("ts", "timestamp", "created", "modified"), None),
+    ("hostname", ("hostname",), None),
+    ("domain", ("domain",), None),
+    ("ts", ("ts",), None),
+    ("ts_type", ("ts_type",), None),
+    ("filename", ("filename", "name"), None),
+    ("filename_index", ("filename_index",), None),
+    ("path", ("path", "full_path"), None),
+    ("segment", ("segment", "mft_entry", "entry"), None),
+    ("filesize", ("filesize", "size"), None),
+    ("resident", ("resident",), None),
+    ("inuse", ("inuse", "is_allocated"), True),
+    ("ads", ("ads",), False),
+    ("owner", ("owner",), None),
+    ("volume_uuid", ("volume_uuid",), None),
+)
+# Fields coerced to int when the record holds another numeric representation
+INT_FIELDS = frozenset({"filename_index", "segment", "filesize"})
+_builders: dict = {}
+
+
+def encode_line(record: dict) -> bytes:
+    """Serialize ``record`` as one UTF-8 JSONL line (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(record, default=str, option=ORJSON_OPTIONS)
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
 
 
 class ChunkedJSONLWriter:
@@ -20,30 +62,44 @@ class ChunkedJSONLWriter:
         self._file_index = 0
         self._line_count = 0
         self._handle = None
+        self._buf = bytearray()
+        self._buf_lines = 0
         self.files: list[Path] = []
 
+    def _flush_batch(self):
+        if self._buf:
+            self._handle.write(self._buf)
+            self._buf.clear()
+        self._buf_lines = 0
+
     def _rotate(self):
         if self._handle:
+            self._flush_batch()
             self._handle.close()
         self._file_index += 1
         self._line_count = 0
         file_path = self.output_dir / f"{self.base_name}_{self._file_index:04d}.jsonl"
-        self._handle = open(file_path, "w", encoding="utf-8")
+        self._handle = open(file_path, "wb", buffering=WRITE_BUFFER_SIZE)
         self.files.append(file_path)
         print(f"[writer] Nouveau fichier créé: {file_path}")
 
     def write(self, record: dict):
         if self._handle is None or self._line_count >= self.max_lines:
             self._rotate()
-        self._handle.write(json.dumps(record, default=str) + "\n")
+        self._buf += encode_line(record)
         self._line_count += 1
+        self._buf_lines += 1
+        if self._buf_lines >= WRITE_BATCH_LINES:
+            self._flush_batch()
 
     def flush(self):
         if self._handle:
+            self._flush_batch()
             self._handle.flush()
 
     def close(self):
         if self._handle:
+            self._flush_batch()
             self._handle.close()
             self._handle = None
 
@@ -54,23 +110,56 @@ class ChunkedJSONLWriter:
         self.close()
 
 
-def normalize_value(value):
-    if value is None or isinstance(value, (bool, int, float)):
+def to_int(value):
+    if value is None or type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
         return value
-    if isinstance(value, (list, tuple, set)):
-        return [normalize_value(v) for v in value]
-    if isinstance(value, dict):
-        return {k: normalize_value(v) for k, v in value.items()}
-    return str(value)
 
 
-def safe_getattr(obj, *attrs, default=None):
-    for attr in attrs:
-        if hasattr(obj, attr):
-            value = getattr(obj, attr)
-            if value is not None:
-                return value
-    return default
+def attribute_expr(name: str) -> str:
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return f"entry.{name}"
+    return f"getattr(entry, {name!r}, None)"
+
+
+def compile_builder(entry):
+    """Generate a straight-line ``build(entry, case_id, evidence_uid)`` for this record type.
+
+    FIELD_SPECS is resolved against the attributes the record actually has and the
+    result is inlined as plain attribute reads feeding a single dict display, which
+    CPython allocates at its final size (merging a ``**base`` mapping would grow it).
+    """
+    lines = ["def build(entry, case_id, evidence_uid):"]
+    items = ["'case_id': case_id", "'evidence_uid': evidence_uid", "'source': 'dissect.mft'"]
+    for idx, (key, names, default) in enumerate(FIELD_SPECS):
+        present = [name for name in names if hasattr(entry, name)]
+        if not present:
+            items.append(f"{key!r}: {default!r}")
+            continue
+        var = f"v{idx}"
+        lines.append(f"    {var} = {attribute_expr(present[0])}")
+        for name in present[1:]:
+            lines.append(f"    if {var} is None:")
+            lines.append(f"        {var} = {attribute_expr(name)}")
+        if default is not None:
+            lines.append(f"    if {var} is None:")
+            lines.append(f"        {var} = {default!r}")
+        items.append(f"{key!r}: to_int({var})" if key in INT_FIELDS else f"{key!r}: {var}")
+    lines.append(f"    return {{{', '.join(items)}}}")
+    namespace: dict = {"to_int": to_int}
+    exec("\n".join(lines), namespace)
+    return namespace["build"]
+
+
+def build_doc(entry, case_id: str, evidence_uid: str) -> dict:
+    # Builders are generated once per record type: every record of a dissect descriptor has the same fields
+    build = _builders.get(type(entry))
+    if build is None:
+        build = _builders[type(entry)] = compile_builder(entry)
+    return build(entry, case_id, evidence_uid)
 
 
 def main():
@@ -98,43 +187,13 @@ def main():
         with ChunkedJSONLWriter(output_dir_path, base_name="mft_extract") as writer:
             for entry in mft_plugin:
                 total_records += 1
-                doc = {
-                    "case_id": case_id,
-                    "evidence_uid": evidence_uid,
-                    "source": "dissect.mft",
-                    "@timestamp": normalize_value(
-                        safe_getattr(entry, "ts", "timestamp", "created", "modified")
-                    ),
-                    "hostname": normalize_value(safe_getattr(entry, "hostname")),
-                    "domain": normalize_value(safe_getattr(entry, "domain")),
-                    "ts": normalize_value(safe_getattr(entry, "ts")),
-                    "ts_type": normalize_value(safe_getattr(entry, "ts_type")),
-                    "filename": normalize_value(safe_getattr(entry, "filename", "name")),
-                    "filename_index": normalize_value(safe_getattr(entry, "filename_index")),
-                    "path": normalize_value(safe_getattr(entry, "path", "full_path")),
-                    "segment": normalize_value(safe_getattr(entry, "segment", "mft_entry", "entry")),
-                    "filesize": normalize_value(safe_getattr(entry, "filesize", "size")),
-                    "resident": normalize_value(safe_getattr(entry, "resident")),
-                    "inuse": normalize_value(safe_getattr(entry, "inuse", "is_allocated", default=True)),
-                    "ads": normalize_value(safe_getattr(entry, "ads", default=False)),
-                    "owner": normalize_value(safe_getattr(entry, "owner")),
-                    "volume_uuid": normalize_value(safe_getattr(entry, "volume_uuid")),
-                }
-
-                for numeric_key in ("filename_index", "segment", "filesize"):
-                    if doc.get(numeric_key) is not None:
-                        try:
-                            doc[numeric_key] = int(doc[numeric_key])
-                        except (TypeError, ValueError):
-                            pass
-
-                writer.write(doc)
-
-                if total_records % FLUSH_INTERVAL == 0:
-                    writer.flush()
+                # MFT record fields are all scalars: non-JSON types (datetime, path...)
+                # are stringified by the encoder's default=str
+                writer.write(build_doc(entry, case_id, evidence_uid))
+
+                if total_records % PROGRESS_INTERVAL == 0:
                     print(f"Traité {total_records} enregistrements MFT...")
 
-            writer.flush()
             created_files = list(writer.files)
 
         print(f"Total d'enregistrements MFT extraits: {total_records}")
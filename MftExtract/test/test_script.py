@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Regression tests for the generated MFT document builders.
+
+Each generated builder is checked against a copy of the original per-record dict
+construction, on the encoded JSONL line (values and key order).
+Run with ``python3 test/test_script.py``.
+"""
+
+import json
+import sys
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path, PureWindowsPath
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import script
+
+
+def normalize_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return [normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    return str(value)
+
+
+def safe_getattr(obj, *attrs, default=None):
+    for attr in attrs:
+        if hasattr(obj, attr):
+            value = getattr(obj, attr)
+            if value is not None:
+                return value
+    return default
+
+
+def reference_doc(entry, case_id, evidence_uid):
+    """Original document construction, one attribute lookup chain per field."""
+    doc = {
+        "case_id": case_id,
+        "evidence_uid": evidence_uid,
+        "source": "dissect.mft",
+        "@timestamp": normalize_value(safe_getattr(entry, "ts", "timestamp", "created", "modified")),
+        "hostname": normalize_value(safe_getattr(entry, "hostname")),
+        "domain": normalize_value(safe_getattr(entry, "domain")),
+        "ts": normalize_value(safe_getattr(entry, "ts")),
+        "ts_type": normalize_value(safe_getattr(entry, "ts_type")),
+        "filename": normalize_value(safe_getattr(entry, "filename", "name")),
+        "filename_index": normalize_value(safe_getattr(entry, "filename_index")),
+        "path": normalize_value(safe_getattr(entry, "path", "full_path")),
+        "segment": normalize_value(safe_getattr(entry, "segment", "mft_entry", "entry")),
+        "filesize": normalize_value(safe_getattr(entry, "filesize", "size")),
+        "resident": normalize_value(safe_getattr(entry, "resident")),
+        "inuse": normalize_value(safe_getattr(entry, "inuse", "is_allocated", default=True)),
+        "ads": normalize_value(safe_getattr(entry, "ads", default=False)),
+        "owner": normalize_value(safe_getattr(entry, "owner")),
+        "volume_uuid": normalize_value(safe_getattr(entry, "volume_uuid")),
+    }
+    for numeric_key in ("filename_index", "segment", "filesize"):
+        if doc.get(numeric_key) is not None:
+            try:
+                doc[numeric_key] = int(doc[numeric_key])
+            except (TypeError, ValueError):
+                pass
+    return doc
+
+
+def make_record_type(type_name, *fields):
+    """Record class exposing exactly ``fields`` as attributes, like a dissect descriptor."""
+    return type(type_name, (), {"__slots__": fields})
+
+
+def make_record(record_type, **values):
+    entry = record_type()
+    for key, value in values.items():
+        setattr(entry, key, value)
+    return entry
+
+
+TS = datetime(2024, 1, 15, 10, 30, 0, 123456, tzinfo=timezone.utc)
+STANDARD_FIELDS = (
+    "ts", "ts_type", "filename", "filename_index", "path", "segment", "filesize",
+    "resident", "inuse", "ads", "owner", "volume_uuid", "hostname", "domain",
+)
+
+
+class MftBuilderTest(unittest.TestCase):
+    def setUp(self):
+        script._builders.clear()
+
+    def assert_same_as_reference(self, entries):
+        for entry in entries:
+            built = script.build_doc(entry, "case_001", "evd_123")
+            expected = json.loads(json.dumps(reference_doc(entry, "case_001", "evd_123"), default=str))
+            decoded = json.loads(script.encode_line(built))
+            self.assertEqual(decoded, expected)
+            self.assertEqual(list(decoded), list(expected))
+
+    def test_standard_record(self):
+        record_type = make_record_type("filesystem_ntfs_mft_std", *STANDARD_FIELDS)
+        self.assert_same_as_reference(
+            [
+                make_record(
+                    record_type, ts=TS, ts_type="B", filename="ntuser.dat", filename_index=1,
+                    path=PureWindowsPath("c:/Users/bob/ntuser.dat"), segment=42, filesize=262144,
+                    resident=False, inuse=True, ads=False, owner="S-1-5-21-1", volume_uuid="a1b2",
+                    hostname="WS01", domain="corp.local",
+                ),
+                make_record(
+                    record_type, ts=None, ts_type=None, filename="é.txt", filename_index="2",
+                    path="c:/é.txt", segment="17", filesize=3.0, resident=True, inuse=None, ads=None,
+                    owner=None, volume_uuid=None, hostname=None, domain=None,
+                ),
+            ]
+        )
+
+    def test_fallback_attributes(self):
+        record_type = make_record_type(
+            "filesystem_ntfs_mft_alt", "timestamp", "created", "modified", "name",
+            "full_path", "mft_entry", "entry", "size", "is_allocated",
+        )
+        self.assert_same_as_reference(
+            [
+                make_record(
+                    record_type, timestamp=None, created=None, modified=TS, name="a.exe",
+                    full_path="c:/a.exe", mft_entry=None, entry=7, size="12", is_allocated=False,
+                ),
+                make_record(
+                    record_type, timestamp=TS, created=TS, modified=None, name=None,
+                    full_path=None, mft_entry=9, entry=None, size=None, is_allocated=None,
+                ),
+            ]
+        )
+
+    def test_missing_attributes_use_defaults(self):
+        record_type = make_record_type("filesystem_ntfs_mft_empty")
+        self.assert_same_as_reference([make_record(record_type)])
+
+    def test_non_numeric_values_are_kept(self):
+        record_type = make_record_type("filesystem_ntfs_mft_odd", "filename_index", "segment", "filesize", "owner")
+        self.assert_same_as_reference(
+            [
+                make_record(record_type, filename_index="n/a", segment=True, filesize=None, owner=["S-1", PureWindowsPath("c:/")]),
+                make_record(record_type, filename_index=2.7, segment="0x10", filesize="", owner=("S-2",)),
+            ]
+        )
+
+    def test_one_builder_per_record_type(self):
+        first = make_record_type("filesystem_ntfs_mft_a", "ts")
+        second = make_record_type("filesystem_ntfs_mft_b", "timestamp")
+        self.assert_same_as_reference([make_record(first, ts=TS), make_record(second, timestamp=TS)])
+        self.assertEqual(set(script._builders), {first, second})
+
+
+if __name__ == "__main__":
+    unittest.main()
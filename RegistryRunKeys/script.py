@@ -3,23 +3,52 @@
 from __future__ import annotations
 
 import json
+import keyword
 import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterator, Optional
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - repli sur la bibliothèque standard
+    orjson = None  # type: ignore
 
 from dissect.target import Target
 from dissect.target.exceptions import TargetError
 
-MAX_LINES_PER_FILE = int(os.getenv("MAX_LINES_PER_FILE", "100000"))
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Instantané de l'environnement, lu une seule fois au démarrage
+ENV = os.environ.copy()
+
+MAX_LINES_PER_FILE = int(ENV.get("MAX_LINES_PER_FILE", "100000"))
+# Tampon d'écriture des JSONL : les lignes sont regroupées en peu d'appels write()
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# Lignes sérialisées accumulées en mémoire avant chaque write()
+WRITE_BATCH_LINES = 1024
+# (clé de sortie, attributs essayés dans l'ordre) ; le premier non None l'emporte
+FIELD_SPECS = (
+    ("@timestamp", ("ts", "timestamp")),
+    ("hostname", ("hostname",)),
+    ("domain", ("domain",)),
+    ("username", ("username",)),
+    ("user_sid", ("user_id", "sid")),
+    ("hive_path", ("regf_hive_path", "hive_path")),
+    ("registry_path", ("regf_key_path", "key")),
+    ("value_name", ("name",)),
+)
+# Types déjà natifs JSON ; les autres sont convertis par default=str à l'encodage
+PASS_TYPES = frozenset({type(None), bool, int, float, str})
+LOG_LEVEL = ENV.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger("registry_run_keys")
+if orjson is not None:
+    # datetime via default=str comme avec json (pas de "T" ISO)
+    ORJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_PASSTHROUGH_DATETIME
 
 
 def env_or_exit(name: str) -> str:
-    value = os.getenv(name)
+    value = ENV.get(name)
     if not value:
         raise SystemExit(f"{name} doit être défini")
     return value
@@ -33,6 +62,13 @@ class ScriptContext:
     output_dir: Path
 
 
+def encode_line(obj: Dict) -> bytes:
+    """Sérialise ``obj`` en une ligne JSONL UTF-8 (orjson si disponible)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS)
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
 class ChunkedJSONLWriter:
     def __init__(self, output_dir: Path, base_name: str, max_lines: int = MAX_LINES_PER_FILE) -> None:
         self.output_dir = output_dir
@@ -41,13 +77,22 @@ class ChunkedJSONLWriter:
         self._file_index = 0
         self._line_count = 0
         self._fh = None
+        self._buf = bytearray()
+        self._buf_lines = 0
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def _flush_batch(self) -> None:
+        if self._buf:
+            self._fh.write(self._buf)
+            self._buf.clear()
+        self._buf_lines = 0
+
     def _open_next_file(self) -> None:
         if self._fh:
+            self._flush_batch()
             self._fh.close()
         filename = f"{self.base_name}_{self._file_index:05d}.jsonl"
-        self._fh = (self.output_dir / filename).open("w", encoding="utf-8")
+        self._fh = (self.output_dir / filename).open("wb", buffering=WRITE_BUFFER_SIZE)
         self._line_count = 0
         self._file_index += 1
         logger.debug("Création du fichier %s", filename)
@@ -55,32 +100,64 @@ class ChunkedJSONLWriter:
     def write(self, obj: Dict) -> None:
         if not self._fh or self._line_count >= self.max_lines:
             self._open_next_file()
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._buf += encode_line(obj)
         self._line_count += 1
+        self._buf_lines += 1
+        if self._buf_lines >= WRITE_BATCH_LINES:
+            self._flush_batch()
 
     def close(self) -> None:
         if self._fh:
+            self._flush_batch()
             self._fh.close()
             self._fh = None
 
 
 def normalize(value):
-    if value is None or isinstance(value, (bool, int, float)):
+    """Convertit les conteneurs ; les scalaires non JSON sont laissés à l'encodeur (default=str)."""
+    if type(value) in PASS_TYPES:
         return value
     if isinstance(value, (list, tuple, set)):
         return [normalize(v) for v in value]
     if isinstance(value, dict):
         return {k: normalize(v) for k, v in value.items()}
-    return str(value)
+    return value
+
+
+_builders: Dict[type, Callable] = {}
+
+
+def attribute_expr(name: str) -> str:
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return f"entry.{name}"
+    return f"getattr(entry, {name!r}, None)"
+
 
+def compile_builder(entry) -> Callable:
+    """Génère ``build(entry, case_id, evidence_uid, value_data, executable, args)`` pour ce type d'enregistrement.
 
-def safe_getattr(entry, *names, default=None):
-    for name in names:
-        if hasattr(entry, name):
-            value = getattr(entry, name)
-            if value is not None:
-                return value
-    return default
+    FIELD_SPECS est résolu sur les attributs présents puis déroulé en lectures
+    d'attributs directes alimentant un seul dictionnaire littéral, alloué d'emblée
+    à sa taille finale (aucune clé ajoutée après coup).
+    """
+    lines = ["def build(entry, case_id, evidence_uid, value_data, executable, args):"]
+    items = ["'case_id': case_id", "'evidence_uid': evidence_uid", "'source': 'dissect.runkeys'"]
+    for idx, (key, names) in enumerate(FIELD_SPECS):
+        present = [name for name in names if hasattr(entry, name)]
+        if not present:
+            items.append(f"{key!r}: None")
+            continue
+        var = f"v{idx}"
+        lines.append(f"    {var} = {attribute_expr(present[0])}")
+        for name in present[1:]:
+            lines.append(f"    if {var} is None:")
+            lines.append(f"        {var} = {attribute_expr(name)}")
+        items.append(f"{key!r}: {var}")
+    items += ["'value_data': value_data", "'command_executable': executable", "'command_args': args"]
+    lines.append(f"    return {{{', '.join(items)}}}")
+    namespace: Dict[str, object] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["build"]  # type: ignore[return-value]
 
 
 def load_context() -> ScriptContext:
@@ -90,8 +167,8 @@ def load_context() -> ScriptContext:
     if not evidence_path.exists():
         raise SystemExit(f"Evidence introuvable: {evidence_path}")
     return ScriptContext(
-        case_id=os.getenv("CASE_ID"),
-        evidence_uid=os.getenv("EVIDENCE_UID"),
+        case_id=ENV.get("CASE_ID"),
+        evidence_uid=ENV.get("EVIDENCE_UID"),
         evidence_path=evidence_path,
         output_dir=output_dir,
     )
@@ -107,7 +184,7 @@ def iter_runkeys(target: Target) -> Iterator[object]:
 
 def record_from_entry(entry, ctx: ScriptContext) -> Dict:
     executable, args = None, None
-    command = safe_getattr(entry, "command")
+    command = getattr(entry, "command", None)
     if isinstance(command, (tuple, list)) and command:
         executable = command[0]
         if len(command) > 1:
@@ -115,22 +192,12 @@ def record_from_entry(entry, ctx: ScriptContext) -> Dict:
     elif isinstance(command, str):
         executable = command
 
-    return {
-        "case_id": ctx.case_id,
-        "evidence_uid": ctx.evidence_uid,
-        "source": "dissect.runkeys",
-        "@timestamp": normalize(safe_getattr(entry, "ts", "timestamp")),
-        "hostname": normalize(safe_getattr(entry, "hostname")),
-        "domain": normalize(safe_getattr(entry, "domain")),
-        "username": normalize(safe_getattr(entry, "username")),
-        "user_sid": normalize(safe_getattr(entry, "user_id", "sid")),
-        "hive_path": normalize(safe_getattr(entry, "regf_hive_path", "hive_path")),
-        "registry_path": normalize(safe_getattr(entry, "regf_key_path", "key")),
-        "value_name": normalize(safe_getattr(entry, "name")),
-        "value_data": normalize(safe_getattr(entry, "command")),
-        "command_executable": normalize(executable),
-        "command_args": normalize(args),
-    }
+    # Un constructeur par type d'enregistrement : tous les enregistrements d'un descripteur dissect ont les mêmes champs
+    build = _builders.get(type(entry))
+    if build is None:
+        build = _builders[type(entry)] = compile_builder(entry)
+    # command peut être un tuple (exécutable, arguments) selon la version de dissect
+    return build(entry, ctx.case_id, ctx.evidence_uid, normalize(command), normalize(executable), normalize(args))
 
 
 def main() -> None:
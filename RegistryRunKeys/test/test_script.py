@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Tests de non-régression des constructeurs générés pour les clés Run.
+
+Chaque enregistrement est comparé à une copie de la construction d'origine, sur la
+ligne JSONL encodée (valeurs et ordre des clés).
+Lancement : ``python3 test/test_script.py``.
+"""
+
+import json
+import sys
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path, PureWindowsPath
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import script
+
+
+def normalize(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    return str(value)
+
+
+def safe_getattr(entry, *names, default=None):
+    for name in names:
+        if hasattr(entry, name):
+            value = getattr(entry, name)
+            if value is not None:
+                return value
+    return default
+
+
+def reference_record(entry, ctx):
+    """Construction d'origine, une chaîne de getattr par champ."""
+    executable, args = None, None
+    command = safe_getattr(entry, "command")
+    if isinstance(command, (tuple, list)) and command:
+        executable = command[0]
+        if len(command) > 1:
+            args = command[1]
+    elif isinstance(command, str):
+        executable = command
+    return {
+        "case_id": ctx.case_id,
+        "evidence_uid": ctx.evidence_uid,
+        "source": "dissect.runkeys",
+        "@timestamp": normalize(safe_getattr(entry, "ts", "timestamp")),
+        "hostname": normalize(safe_getattr(entry, "hostname")),
+        "domain": normalize(safe_getattr(entry, "domain")),
+        "username": normalize(safe_getattr(entry, "username")),
+        "user_sid": normalize(safe_getattr(entry, "user_id", "sid")),
+        "hive_path": normalize(safe_getattr(entry, "regf_hive_path", "hive_path")),
+        "registry_path": normalize(safe_getattr(entry, "regf_key_path", "key")),
+        "value_name": normalize(safe_getattr(entry, "name")),
+        "value_data": normalize(safe_getattr(entry, "command")),
+        "command_executable": normalize(executable),
+        "command_args": normalize(args),
+    }
+
+
+def make_record_type(type_name, *fields):
+    """Classe d'enregistrement exposant exactement ``fields``, comme un descripteur dissect."""
+    return type(type_name, (), {"__slots__": fields})
+
+
+def make_record(record_type, **values):
+    entry = record_type()
+    for key, value in values.items():
+        setattr(entry, key, value)
+    return entry
+
+
+TS = datetime(2024, 1, 15, 10, 30, 0, tzinfo=timezone.utc)
+RUNKEY_FIELDS = (
+    "ts", "hostname", "domain", "username", "user_id", "regf_hive_path", "regf_key_path", "name", "command",
+)
+CTX = script.ScriptContext(case_id="case_001", evidence_uid=None, evidence_path=Path("."), output_dir=Path("."))
+
+
+class RunKeysBuilderTest(unittest.TestCase):
+    def setUp(self):
+        script._builders.clear()
+
+    def assert_same_as_reference(self, entries):
+        for entry in entries:
+            built = script.record_from_entry(entry, CTX)
+            expected = json.loads(json.dumps(reference_record(entry, CTX), default=str))
+            decoded = json.loads(script.encode_line(built))
+            self.assertEqual(decoded, expected)
+            self.assertEqual(list(decoded), list(expected))
+
+    def test_standard_record(self):
+        record_type = make_record_type("windows_registry_run", *RUNKEY_FIELDS)
+        common = dict(
+            ts=TS, hostname="WS01", domain="corp.local", username="bob", user_id="S-1-5-21-1",
+            regf_hive_path=PureWindowsPath("C:/Users/bob/NTUSER.DAT"),
+            regf_key_path="HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run", name="Updater",
+        )
+        self.assert_same_as_reference(
+            [
+                make_record(record_type, command=("C:\\Program Files\\app.exe", "--silent"), **common),
+                make_record(record_type, command=[PureWindowsPath("C:/évil.exe")], **common),
+                make_record(record_type, command="C:\\Windows\\run.exe /q", **common),
+                make_record(record_type, command=None, **common),
+                make_record(record_type, command=(), **common),
+            ]
+        )
+
+    def test_fallback_attributes(self):
+        record_type = make_record_type("windows_registry_run_alt", "timestamp", "sid", "hive_path", "key", "name", "command")
+        self.assert_same_as_reference(
+            [
+                make_record(record_type, timestamp=TS, sid="S-1-5-18", hive_path="SOFTWARE", key="Run", name=None, command=42),
+                make_record(record_type, timestamp=None, sid=None, hive_path=None, key=None, name="x", command=("a", "b", "c")),
+            ]
+        )
+
+    def test_first_attribute_none_falls_back(self):
+        record_type = make_record_type("windows_registry_run_both", "ts", "timestamp", "user_id", "sid", "regf_key_path", "key")
+        self.assert_same_as_reference(
+            [
+                make_record(record_type, ts=None, timestamp=TS, user_id=None, sid="S-1", regf_key_path=None, key="Run"),
+                make_record(record_type, ts=TS, timestamp=None, user_id="S-2", sid="S-1", regf_key_path="RunOnce", key="Run"),
+            ]
+        )
+
+    def test_missing_attributes(self):
+        self.assert_same_as_reference([make_record(make_record_type("windows_registry_run_empty"))])
+
+    def test_nested_values(self):
+        record_type = make_record_type("windows_registry_run_nested", "command", "name")
+        self.assert_same_as_reference(
+            [make_record(record_type, command=({"k": TS}, [True, 1.5, None]), name=b"raw")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,21 +3,51 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import io
 import json
 import logging
+import mmap
+import multiprocessing
 import os
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterator, Optional, Sequence, Set, Tuple
+from stat import S_ISREG
+from typing import Dict, Iterator, List, Optional, Pattern, Sequence, Set, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - repli sur la bibliothèque standard
+    orjson = None  # type: ignore
 
 import yara
 from dissect.target import Target
 from dissect.target.exceptions import FilesystemError, TargetError
 from dissect.target.helpers.fsutil import TargetPath
 
-MAX_LINES_PER_FILE = int(os.getenv("MAX_LINES_PER_FILE", "100000"))
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Instantané de l'environnement, lu une seule fois au démarrage
+ENV = os.environ.copy()
+
+MAX_LINES_PER_FILE = int(ENV.get("MAX_LINES_PER_FILE", "100000"))
+# Tampon d'écriture des JSONL : les lignes sont regroupées en peu d'appels write()
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# Lignes sérialisées accumulées en mémoire avant chaque write()
+WRITE_BATCH_LINES = 1024
+# Fichiers lus à l'avance pendant le matching (chacun jusqu'à YARA_MAX_FILESIZE_MB)
+YARA_PREFETCH = max(1, int(ENV.get("YARA_PREFETCH", "4")))
+# Règles compilées (Rules.save) réutilisées tant que les sources (includes compris) sont inchangées
+YARA_RULES_CACHE = ENV.get("YARA_RULES_CACHE", "0").lower() in {"1", "true", "yes"}
+RULES_CACHE_DIR = Path.home() / ".cache" / "requiem" / "yara"
+# Réglages globaux du moteur YARA, appliqués par configure_yara_engine (main et workers)
+YARA_STACK_SIZE = int(ENV.get("YARA_STACK_SIZE", "65536"))
+YARA_MAX_STRINGS_PER_RULE = int(ENV.get("YARA_MAX_STRINGS_PER_RULE", "10000"))
+LOG_LEVEL = ENV.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger("yara_disk_scan")
 
@@ -35,11 +65,15 @@ DEFAULT_EXTENSIONS = {
 }
 DEFAULT_EXCLUDES = {"system volume information", "$recycle.bin", "windows.old", "winsxs"}
 SEVERITY_KEYS = ("severity", "confidence", "score", "level", "weight")
+# Octets ASCII imprimables (plus tabulation et fins de ligne) : extrait publié en clair
+PRINTABLE_BYTES = bytes(range(0x20, 0x7F)) + b"\t\n\r"
+# Directive include d'un fichier de règles (chemin relatif au fichier qui l'inclut)
+INCLUDE_PATTERN = re.compile(rb'^[ \t]*include[ \t]+"([^"\r\n]+)"', re.MULTILINE)
 ROOT_CANDIDATES = ("/", "\\", "C:", "C:/", "C\\", "\\Device\\HarddiskVolume1")
 
 
 def env_or_exit(name: str) -> str:
-    value = os.getenv(name)
+    value = ENV.get(name)
     if not value:
         raise SystemExit(f"{name} doit être défini")
     return value
@@ -65,6 +99,16 @@ class ScanConfig:
     min_severity: Optional[float]
     require_severity: bool
     yara_timeout: int
+    workers: int
+    fast_mode: bool
+    extension_pattern: Optional[Pattern[str]] = None
+
+
+def encode_line(obj: Dict) -> bytes:
+    """Sérialise ``obj`` en une ligne JSONL UTF-8 (orjson si disponible)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
 
 
 class ChunkedJSONLWriter:
@@ -75,13 +119,22 @@ class ChunkedJSONLWriter:
         self._file_index = 0
         self._line_count = 0
         self._fh = None
+        self._buf = bytearray()
+        self._buf_lines = 0
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def _flush_batch(self) -> None:
+        if self._buf:
+            self._fh.write(self._buf)
+            self._buf.clear()
+        self._buf_lines = 0
+
     def _open_next_file(self) -> None:
         if self._fh:
+            self._flush_batch()
             self._fh.close()
         filename = f"{self.base_name}_{self._file_index:05d}.jsonl"
-        self._fh = (self.output_dir / filename).open("w", encoding="utf-8")
+        self._fh = (self.output_dir / filename).open("wb", buffering=WRITE_BUFFER_SIZE)
         self._line_count = 0
         self._file_index += 1
         logger.debug("Nouveau fichier JSONL: %s", filename)
@@ -89,11 +142,15 @@ class ChunkedJSONLWriter:
     def write(self, obj: Dict) -> None:
         if not self._fh or self._line_count >= self.max_lines:
             self._open_next_file()
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._buf += encode_line(obj)
         self._line_count += 1
+        self._buf_lines += 1
+        if self._buf_lines >= WRITE_BATCH_LINES:
+            self._flush_batch()
 
     def close(self) -> None:
         if self._fh:
+            self._flush_batch()
             self._fh.close()
             self._fh = None
 
@@ -113,6 +170,21 @@ def parse_excludes(value: Optional[str]) -> Set[str]:
     return {item.strip().lower() for item in value.split(",") if item.strip()}
 
 
+def compile_extension_pattern(extensions: Optional[Set[str]]) -> Optional[Pattern[str]]:
+    """Regex testant la fin du nom de fichier, sans distinction de casse (None : pas de filtre)."""
+    if extensions is None:
+        return None
+    # Comme Path.suffix : un seul point suivi d'au moins un caractère (".tar.gz" ou "." ne
+    # correspondent à aucun fichier)
+    alternatives = "|".join(
+        re.escape(ext[1:]) for ext in sorted(extensions) if len(ext) > 1 and "." not in ext[1:]
+    )
+    if not alternatives:
+        return re.compile(r"(?!)")
+    # (?<=.) : comme pathlib, un nom commençant par le point n'a pas d'extension
+    return re.compile(r"(?<=.)\.(?:" + alternatives + r")\Z", re.IGNORECASE | re.DOTALL)
+
+
 def load_context() -> ScriptContext:
     evidence_path = Path(env_or_exit("EVIDENCE_PATH"))
     output_dir = Path(env_or_exit("OUTPUT_DIR"))
@@ -120,8 +192,8 @@ def load_context() -> ScriptContext:
         raise SystemExit(f"Evidence introuvable: {evidence_path}")
     output_dir.mkdir(parents=True, exist_ok=True)
     return ScriptContext(
-        case_id=os.getenv("CASE_ID"),
-        evidence_uid=os.getenv("EVIDENCE_UID"),
+        case_id=ENV.get("CASE_ID"),
+        evidence_uid=ENV.get("EVIDENCE_UID"),
         evidence_path=evidence_path,
         output_dir=output_dir,
     )
@@ -129,17 +201,19 @@ def load_context() -> ScriptContext:
 
 def load_scan_config() -> ScanConfig:
     rules_path = Path(env_or_exit("YARA_RULES_PATH"))
-    include_extensions = parse_extensions(os.getenv("YARA_INCLUDE_EXT"))
-    exclude_dirs = parse_excludes(os.getenv("YARA_EXCLUDE_DIRS"))
-    max_file_size_mb = float(os.getenv("YARA_MAX_FILESIZE_MB", "50"))
+    include_extensions = parse_extensions(ENV.get("YARA_INCLUDE_EXT"))
+    exclude_dirs = parse_excludes(ENV.get("YARA_EXCLUDE_DIRS"))
+    max_file_size_mb = float(ENV.get("YARA_MAX_FILESIZE_MB", "50"))
     max_file_size = int(max_file_size_mb * 1024 * 1024)
-    max_matches = int(os.getenv("YARA_MAX_MATCHES_PER_FILE", "5"))
-    max_strings = int(os.getenv("YARA_MAX_STRINGS", "3"))
-    string_sample_bytes = int(os.getenv("YARA_STRING_SAMPLE_BYTES", "96"))
-    min_severity_env = os.getenv("YARA_MIN_SEVERITY")
+    max_matches = int(ENV.get("YARA_MAX_MATCHES_PER_FILE", "5"))
+    max_strings = int(ENV.get("YARA_MAX_STRINGS", "3"))
+    string_sample_bytes = int(ENV.get("YARA_STRING_SAMPLE_BYTES", "96"))
+    min_severity_env = ENV.get("YARA_MIN_SEVERITY")
     min_severity = float(min_severity_env) if min_severity_env else None
-    require_severity = os.getenv("YARA_REQUIRE_SEVERITY", "0") in {"1", "true", "TRUE", "yes"}
-    yara_timeout = int(os.getenv("YARA_TIMEOUT_SECONDS", "30"))
+    require_severity = ENV.get("YARA_REQUIRE_SEVERITY", "0") in {"1", "true", "TRUE", "yes"}
+    yara_timeout = int(ENV.get("YARA_TIMEOUT_SECONDS", "30"))
+    workers = max(1, int(ENV.get("YARA_WORKERS", "0")) or os.cpu_count() or 1)
+    fast_mode = ENV.get("YARA_FAST_MODE", "0").lower() in {"1", "true", "yes"}
     return ScanConfig(
         rules_path=rules_path,
         include_extensions=include_extensions,
@@ -151,6 +225,9 @@ def load_scan_config() -> ScanConfig:
         min_severity=min_severity,
         require_severity=require_severity,
         yara_timeout=yara_timeout,
+        workers=workers,
+        fast_mode=fast_mode,
+        extension_pattern=compile_extension_pattern(include_extensions),
     )
 
 
@@ -159,19 +236,85 @@ def gather_rule_files(path: Path) -> Sequence[Path]:
     return sorted(candidates)
 
 
+def rules_cache_path(rules_path: Path, rule_files: Sequence[Path]) -> Optional[Path]:
+    """Emplacement du cache pour ce jeu de règles : empreinte du contenu de chaque fichier compilé.
+
+    Les fichiers cités par ``include`` sont suivis récursivement. Si l'un d'eux est
+    illisible, ``None`` est renvoyé et les règles sont simplement recompilées.
+    """
+    fingerprint = hashlib.blake2b(digest_size=16)
+    # Le format compilé dépend de la version de libyara
+    fingerprint.update(yara.__version__.encode())
+    seen: Set[Path] = set()
+    stack = list(reversed(rule_files))
+    while stack:
+        rule = stack.pop()
+        if rule in seen:
+            continue
+        seen.add(rule)
+        try:
+            content = rule.read_bytes()
+        except OSError as exc:
+            logger.warning("Fichier de règles %s illisible (%s), cache désactivé", rule, exc)
+            return None
+        fingerprint.update(f"\0{rule}\0{len(content)}\0".encode("utf-8", "surrogateescape"))
+        fingerprint.update(content)
+        includes = [Path(os.fsdecode(match.group(1))) for match in INCLUDE_PATTERN.finditer(content)]
+        stack.extend(rule.parent / included for included in reversed(includes))
+    source = hashlib.blake2b(str(rules_path.resolve()).encode("utf-8", "surrogateescape"), digest_size=8)
+    return RULES_CACHE_DIR / f"rules_{source.hexdigest()}_{fingerprint.hexdigest()}.yarc"
+
+
+def load_cached_rules(cache_path: Path):
+    if not cache_path.is_file():
+        return None
+    try:
+        rules = yara.load(str(cache_path))
+    except yara.Error as exc:
+        logger.warning("Cache de règles YARA illisible (%s), recompilation", exc)
+        return None
+    logger.info("Règles YARA chargées depuis le cache %s", cache_path)
+    return rules
+
+
+def save_cached_rules(rules, cache_path: Path) -> None:
+    """Enregistre ``rules`` et supprime les versions précédentes du même jeu de règles."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        rules.save(str(tmp_path))
+        os.replace(tmp_path, cache_path)
+    except (OSError, yara.Error) as exc:
+        logger.warning("Impossible d'écrire le cache de règles YARA: %s", exc)
+        return
+    prefix = cache_path.name.rsplit("_", 1)[0] + "_"
+    for stale in cache_path.parent.glob(f"{prefix}*.yarc"):
+        if stale != cache_path:
+            stale.unlink(missing_ok=True)
+
+
 def compile_rules(config: ScanConfig) -> "yara.Rules":
     path = config.rules_path
     if not path.exists():
         raise SystemExit(f"Chemin de règles introuvable: {path}")
-    if path.is_file():
-        logger.info("Compilation de %s", path)
-        return yara.compile(filepath=str(path))
-    rule_files = gather_rule_files(path)
+    rule_files = [path] if path.is_file() else gather_rule_files(path)
     if not rule_files:
         raise SystemExit(f"Aucune règle .yar trouvée sous {path}")
-    file_map = {f"rule_{idx}": str(rule) for idx, rule in enumerate(rule_files)}
-    logger.info("Compilation de %d fichiers YARA", len(rule_files))
-    return yara.compile(filepaths=file_map)
+    cache_path = rules_cache_path(path, rule_files) if YARA_RULES_CACHE else None
+    if cache_path is not None:
+        rules = load_cached_rules(cache_path)
+        if rules is not None:
+            return rules
+    if path.is_file():
+        logger.info("Compilation de %s", path)
+        rules = yara.compile(filepath=str(path))
+    else:
+        file_map = {f"rule_{idx}": str(rule) for idx, rule in enumerate(rule_files)}
+        logger.info("Compilation de %d fichiers YARA", len(rule_files))
+        rules = yara.compile(filepaths=file_map)
+    if cache_path is not None:
+        save_cached_rules(rules, cache_path)
+    return rules
 
 
 def safe_stat(path: TargetPath):
@@ -182,16 +325,17 @@ def safe_stat(path: TargetPath):
 
 
 def should_scan_file(path: TargetPath, config: ScanConfig):
+    # Filtres sur le chemin d'abord : stat() n'est appelé que pour les candidats
+    if config.extension_pattern is not None and not config.extension_pattern.search(path.name):
+        return None
+    # Les dossiers exclus sont élagués par le parcours : seul le nom de l'entrée reste à tester
+    if path.name.lower() in config.exclude_dirs:
+        return None
     stat = safe_stat(path)
     if stat is None:
         return None
     if stat.st_size == 0 or stat.st_size > config.max_file_size:
         return None
-    if config.include_extensions is not None and path.suffix.lower() not in config.include_extensions:
-        return None
-    parts_lower = {part.lower() for part in path.parts}
-    if parts_lower & config.exclude_dirs:
-        return None
     return stat
 
 
@@ -207,16 +351,34 @@ def extract_severity(meta: Dict[str, object]) -> Optional[float]:
     return None
 
 
+def iter_string_hits(match) -> Iterator[Tuple[int, str, bytes]]:
+    """(offset, identifiant, données) de chaque occurrence, quelle que soit la version de yara-python.
+
+    Avant 4.3, ``match.strings`` est une liste de tuples ; depuis, d'objets ``StringMatch``
+    portant leurs ``instances``.
+    """
+    for string in match.strings:
+        if isinstance(string, tuple):
+            yield string
+            continue
+        for instance in string.instances:
+            yield instance.offset, string.identifier, instance.matched_data
+
+
 def format_strings(match, config: ScanConfig) -> Sequence[Dict[str, object]]:
+    """Extraits des chaînes trouvées : en clair (``snippet``) si ASCII imprimable, sinon ``snippet_b64``."""
     entries = []
-    for idx, (offset, identifier, data) in enumerate(match.strings):
+    for idx, (offset, identifier, data) in enumerate(iter_string_hits(match)):
         if idx >= config.max_strings:
             break
-        if isinstance(data, bytes):
-            snippet = base64.b64encode(data[: config.string_sample_bytes]).decode("ascii")
+        if not isinstance(data, bytes):
+            entries.append({"identifier": identifier, "offset": offset, "snippet": str(data)[: config.string_sample_bytes]})
+            continue
+        sample = data[: config.string_sample_bytes]
+        if not sample.translate(None, PRINTABLE_BYTES):
+            entries.append({"identifier": identifier, "offset": offset, "snippet": sample.decode("ascii")})
         else:
-            snippet = str(data)[: config.string_sample_bytes]
-        entries.append({"identifier": identifier, "offset": offset, "snippet_b64": snippet})
+            entries.append({"identifier": identifier, "offset": offset, "snippet_b64": base64.b64encode(sample).decode("ascii")})
     return entries
 
 
@@ -227,37 +389,90 @@ def file_timestamp(stat) -> Optional[str]:
     return datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def read_file_bytes(path: TargetPath, limit: int) -> Optional[bytes]:
+@dataclass(frozen=True)
+class HostFile:
+    """Fichier réel de l'hôte, projeté en mémoire directement par le worker qui le scanne."""
+
+    path: str
+    size: int
+
+
+ScanData = Union[bytes, mmap.mmap]
+
+
+def start_readahead(fd: int, size: int) -> None:
+    """Demande au noyau de charger le fichier en arrière-plan (pages prêtes avant le matching)."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+
+def read_file_bytes(path: TargetPath, limit: int, share_host_path: bool = False) -> Optional[Union[ScanData, HostFile]]:
+    """Contenu à scanner (``limit`` octets max).
+
+    Quand dissect renvoie un vrai fichier de l'hôte (preuve sous forme de répertoire), il est
+    projeté en mémoire plutôt que copié, ou seulement désigné (``HostFile``) si
+    ``share_host_path`` ; les fichiers virtuels (NTFS, ...) sont lus.
+    """
     try:
         with path.open("rb") as handle:
-            return handle.read(limit)
-    except (FilesystemError, OSError) as exc:
+            try:
+                fd = handle.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                return handle.read(limit)
+            stat = os.fstat(fd)
+            size = min(stat.st_size, limit)
+            if size <= 0:
+                return None
+            # sans lecture préalable, les défauts de page du mmap se feraient pendant le matching
+            start_readahead(fd, size)
+            name = getattr(handle, "name", None)
+            if share_host_path and isinstance(name, str) and os.path.samestat(stat, os.stat(name)):
+                return HostFile(name, size)
+            # le mmap garde son propre descripteur : le fichier peut être refermé
+            return mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+    except (FilesystemError, OSError, ValueError) as exc:
         logger.debug("Lecture impossible de %s: %s", path, exc)
         return None
 
 
-def scan_file(
-    path: TargetPath,
-    stat,
+def map_host_file(host_file: HostFile) -> Optional[mmap.mmap]:
+    try:
+        with open(host_file.path, "rb") as handle:
+            return mmap.mmap(handle.fileno(), host_file.size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as exc:
+        logger.debug("Projection impossible de %s: %s", host_file.path, exc)
+        return None
+
+
+def release_data(data: Optional[ScanData]) -> None:
+    if isinstance(data, mmap.mmap):
+        data.close()
+
+
+def match_records(
     rules,
+    data: ScanData,
+    file_path: str,
+    file_size: Optional[int],
+    ts: Optional[str],
     ctx: ScriptContext,
     config: ScanConfig,
-    writer: ChunkedJSONLWriter,
-) -> int:
-    data = read_file_bytes(path, config.max_file_size)
-    if not data:
-        return 0
+) -> List[Dict[str, object]]:
+    """Applique les règles sur ``data`` et retourne les alertes retenues pour ce fichier."""
     try:
-        matches = rules.match(data=data, timeout=config.yara_timeout)
+        # Mode rapide : chaque chaîne n'est recherchée que jusqu'à sa première occurrence
+        matches = rules.match(data=data, timeout=config.yara_timeout, fast=config.fast_mode)
     except yara.TimeoutError:
-        logger.warning("Timeout YARA sur %s", path)
-        return 0
+        logger.warning("Timeout YARA sur %s", file_path)
+        return []
     except yara.Error as exc:
-        logger.warning("Erreur YARA sur %s: %s", path, exc)
-        return 0
+        logger.warning("Erreur YARA sur %s: %s", file_path, exc)
+        return []
 
-    ts = file_timestamp(stat)
-    matches_written = 0
+    records = []
     for match in matches:
         severity = extract_severity(match.meta)
         if config.require_severity and severity is None:
@@ -269,8 +484,8 @@ def scan_file(
             "case_id": ctx.case_id,
             "evidence_uid": ctx.evidence_uid,
             "source": "yara_disk_scan",
-            "file_path": str(path),
-            "file_size": getattr(stat, "st_size", None),
+            "file_path": file_path,
+            "file_size": file_size,
             "rule_name": match.rule,
             "rule_namespace": match.namespace,
             "tags": match.tags,
@@ -278,11 +493,168 @@ def scan_file(
             "meta": match.meta,
             "strings": format_strings(match, config),
         }
-        writer.write(record)
-        matches_written += 1
-        if matches_written >= config.max_matches_per_file:
+        records.append(record)
+        if len(records) >= config.max_matches_per_file:
             break
-    return matches_written
+    return records
+
+
+def scan_file(
+    path: TargetPath,
+    stat,
+    data: Optional[ScanData],
+    rules,
+    ctx: ScriptContext,
+    config: ScanConfig,
+    writer: ChunkedJSONLWriter,
+) -> int:
+    if not data:
+        return 0
+    try:
+        records = match_records(
+            rules, data, str(path), getattr(stat, "st_size", None), file_timestamp(stat), ctx, config
+        )
+    finally:
+        release_data(data)
+    for record in records:
+        writer.write(record)
+    return len(records)
+
+
+# État des processus de scan, initialisé une fois par worker (voir init_scan_worker)
+_worker_rules = None
+_worker_ctx: Optional[ScriptContext] = None
+_worker_config: Optional[ScanConfig] = None
+
+
+def configure_yara_engine() -> None:
+    """Réglages globaux de libyara pour ce processus (compilation et matching)."""
+    yara.set_config(stack_size=YARA_STACK_SIZE, max_strings_per_rule=YARA_MAX_STRINGS_PER_RULE)
+
+
+def init_scan_worker(compiled_rules: bytes, ctx: ScriptContext, config: ScanConfig) -> None:
+    global _worker_rules, _worker_ctx, _worker_config
+    configure_yara_engine()
+    _worker_rules = yara.load(file=io.BytesIO(compiled_rules))
+    _worker_ctx = ctx
+    _worker_config = config
+
+
+def scan_worker(
+    data: Union[bytes, HostFile], file_path: str, file_size: Optional[int], ts: Optional[str]
+) -> List[Dict[str, object]]:
+    if not isinstance(data, HostFile):
+        return match_records(_worker_rules, data, file_path, file_size, ts, _worker_ctx, _worker_config)
+    mapped = map_host_file(data)
+    if mapped is None:
+        return []
+    try:
+        return match_records(_worker_rules, mapped, file_path, file_size, ts, _worker_ctx, _worker_config)
+    finally:
+        mapped.close()
+
+
+def serialize_rules(rules) -> bytes:
+    buffer = io.BytesIO()
+    rules.save(file=buffer)
+    return buffer.getvalue()
+
+
+def prefetch_files(
+    target: Target, config: ScanConfig, share_host_path: bool = False
+) -> Iterator[Tuple[TargetPath, object, Optional[Union[ScanData, HostFile]]]]:
+    """Parcourt et lit les fichiers dans un thread dédié, jusqu'à YARA_PREFETCH fichiers d'avance.
+
+    Les lectures dissect se font pendant le matching YARA. Un seul thread accède à la cible
+    (dissect n'est pas thread-safe) ; une erreur de parcours est relancée chez le consommateur.
+    """
+    items: "queue.Queue[Optional[Tuple[TargetPath, object, Optional[Union[ScanData, HostFile]]]]]" = queue.Queue(
+        maxsize=YARA_PREFETCH
+    )
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for file_path, stat in walk_files(target, config):
+                data = read_file_bytes(file_path, config.max_file_size, share_host_path)
+                if not put((file_path, stat, data)):
+                    return
+        except BaseException as exc:
+            errors.append(exc)
+        put(None)
+
+    thread = threading.Thread(target=produce, name="yara-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is None:
+                break
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        # consommateur interrompu : le producteur s'arrête au prochain put
+        stop.set()
+        thread.join()
+
+
+def scan_parallel(target: Target, rules, ctx: ScriptContext, config: ScanConfig, writer: ChunkedJSONLWriter) -> Tuple[int, int]:
+    """Répartit le matching YARA sur ``config.workers`` processus.
+
+    Le processus principal garde seul l'accès à dissect (parcours et lecture, non thread-safe).
+    Les fichiers réels de l'hôte sont projetés par les workers eux-mêmes (seul le chemin
+    transite) ; le contenu des fichiers virtuels leur est envoyé. Les résultats sont écrits
+    dans l'ordre de parcours et le nombre de fichiers en vol est borné pour limiter la mémoire.
+    """
+    scanned = 0
+    matches = 0
+    max_pending = config.workers * 2
+    pending: deque = deque()
+    # spawn : le thread yara-prefetch lit déjà via dissect au premier submit ; un fork
+    # copierait les verrous qu'il tient dans les workers
+    with ProcessPoolExecutor(
+        max_workers=config.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_scan_worker,
+        initargs=(serialize_rules(rules), ctx, config),
+    ) as executor:
+        for file_path, stat, data in prefetch_files(target, config, share_host_path=True):
+            scanned += 1
+            if not data:
+                continue
+            if isinstance(data, mmap.mmap):
+                # un mmap ne se transmet pas à un autre processus : copie de son contenu
+                payload = data[:]
+                data.close()
+            else:
+                payload = data
+            pending.append(
+                executor.submit(
+                    scan_worker, payload, str(file_path), getattr(stat, "st_size", None), file_timestamp(stat)
+                )
+            )
+            while len(pending) >= max_pending:
+                matches += write_records(pending.popleft().result(), writer)
+        while pending:
+            matches += write_records(pending.popleft().result(), writer)
+    return scanned, matches
+
+
+def write_records(records: List[Dict[str, object]], writer: ChunkedJSONLWriter) -> int:
+    for record in records:
+        writer.write(record)
+    return len(records)
 
 
 def determine_roots(fs) -> list[TargetPath]:
@@ -313,26 +685,72 @@ def determine_roots(fs) -> list[TargetPath]:
 
 
 def walk_files(target: Target, config: ScanConfig) -> Iterator[Tuple[TargetPath, object]]:
-    fs = target.fs
-    stack = determine_roots(fs)
-    visited = set()
+    """Parcourt les racines de la cible avec ``TargetPath.walk`` (types issus du listing).
+
+    Les dossiers exclus sont élagués au niveau du répertoire. Si ``walk`` est indisponible,
+    ou s'il échoue en cours de route, le parcours pas à pas reprend sans réémettre les
+    fichiers des dossiers déjà traités.
+    """
+    visited: Set[str] = set()
+    for root in determine_roots(target.fs):
+        if not hasattr(root, "walk"):
+            yield from walk_files_dfs(root, config, visited)
+            continue
+        walked: Set[str] = set()
+        try:
+            for dirpath, dirnames, filenames in root.walk():
+                key = str(dirpath).lower()
+                if key in visited:
+                    dirnames[:] = []
+                    continue
+                visited.add(key)
+                walked.add(key)
+                dirnames[:] = [name for name in dirnames if name.lower() not in config.exclude_dirs]
+                for name in filenames:
+                    entry = dirpath / name
+                    stat = should_scan_file(entry, config)
+                    if stat and S_ISREG(stat.st_mode):
+                        yield entry, stat
+        except FilesystemError as exc:
+            logger.debug("walk() interrompu sous %s (%s), reprise pas à pas", root, exc)
+            visited.difference_update(walked)
+            yield from walk_files_dfs(root, config, visited, skip_files=walked)
+
+
+def iter_dir_entries(directory: TargetPath) -> Iterator[TargetPath]:
+    """``iterdir`` paresseux : une entrée illisible est sautée sans abandonner le dossier."""
+    try:
+        iterator = iter(directory.iterdir())
+    except FilesystemError:
+        return
+    while True:
+        try:
+            yield next(iterator)
+        except StopIteration:
+            return
+        except FilesystemError:
+            continue
+
+
+def walk_files_dfs(
+    root: TargetPath, config: ScanConfig, visited: Set[str], skip_files: Set[str] = frozenset()
+) -> Iterator[Tuple[TargetPath, object]]:
+    """Parcours en profondeur via ``iterdir`` ; les fichiers des dossiers de ``skip_files`` sont ignorés."""
+    stack = [root]
     while stack:
         current = stack.pop()
         key = str(current).lower()
         if key in visited:
             continue
         visited.add(key)
-        try:
-            entries = list(current.iterdir())
-        except FilesystemError:
-            continue
-        for entry in entries:
+        emit_files = key not in skip_files
+        for entry in iter_dir_entries(current):
             try:
                 if entry.is_dir():
                     if entry.name.lower() in config.exclude_dirs:
                         continue
                     stack.append(entry)
-                elif entry.is_file():
+                elif emit_files and entry.is_file():
                     stat = should_scan_file(entry, config)
                     if stat:
                         yield entry, stat
@@ -343,15 +761,19 @@ def walk_files(target: Target, config: ScanConfig) -> Iterator[Tuple[TargetPath,
 def main() -> None:
     ctx = load_context()
     config = load_scan_config()
+    configure_yara_engine()
     rules = compile_rules(config)
     writer = ChunkedJSONLWriter(ctx.output_dir, base_name="yara_disk_matches")
     scanned = 0
     matches = 0
     try:
         with Target.open(str(ctx.evidence_path)) as target:
-            for file_path, stat in walk_files(target, config):
-                scanned += 1
-                matches += scan_file(file_path, stat, rules, ctx, config, writer)
+            if config.workers > 1:
+                scanned, matches = scan_parallel(target, rules, ctx, config, writer)
+            else:
+                for file_path, stat, data in prefetch_files(target, config):
+                    scanned += 1
+                    matches += scan_file(file_path, stat, data, rules, ctx, config, writer)
     except TargetError as exc:
         raise SystemExit(f"Impossible d'ouvrir l'image avec dissect.target: {exc}") from exc
     finally:
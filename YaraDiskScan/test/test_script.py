@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests de non-régression du filtre d'extensions (YARA_INCLUDE_EXT).
+
+La regex précompilée est comparée au test d'origine ``Path.suffix.lower() in extensions``.
+Lancement : ``python3 test/test_script.py``.
+"""
+
+import logging
+import sys
+import unittest
+from pathlib import Path, PurePosixPath
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import script
+logging.getLogger("yara_disk_scan").setLevel(logging.WARNING)
+
+NAMES = (
+    "notepad.exe",
+    "NOTEPAD.EXE",
+    "Kernel32.Dll",
+    "archive.tar.gz",
+    "backup.EXE.bak",
+    "setup.exe.",
+    "file.",
+    "file..",
+    ".exe",
+    ".hidden.exe",
+    "..exe",
+    "a..dll",
+    "exe",
+    "noext",
+    "",
+    "x.exe ",
+    "x.ex",
+    "x.exee",
+    "x.com\nfake.txt",
+    "x.txt\n.exe",
+    "données.dat",
+    "x.K",
+    "x.K",
+    "x.e[x]e",
+    "x.a+b",
+)
+
+
+def reference_match(name, extensions):
+    """Test d'origine, appliqué au nom du fichier."""
+    return PurePosixPath(name).suffix.lower() in extensions if name else False
+
+
+class ExtensionPatternTest(unittest.TestCase):
+    def assert_same_as_reference(self, raw):
+        extensions = script.parse_extensions(raw)
+        pattern = script.compile_extension_pattern(extensions)
+        for name in NAMES:
+            with self.subTest(raw=raw, name=name):
+                self.assertEqual(bool(pattern.search(name)), reference_match(name, extensions))
+
+    def test_default_extensions(self):
+        self.assert_same_as_reference(None)
+
+    def test_case_insensitive(self):
+        self.assert_same_as_reference("EXE,Dll")
+        self.assert_same_as_reference(".DAT, .k")
+
+    def test_multiple_dots(self):
+        self.assert_same_as_reference("tar.gz,.exe.bak,exe")
+        self.assert_same_as_reference(".tar.gz")
+
+    def test_dot_only_and_special_characters(self):
+        self.assert_same_as_reference(".,..,ex")
+        self.assert_same_as_reference("e[x]e,a+b")
+
+    def test_no_filter(self):
+        self.assertIsNone(script.compile_extension_pattern(script.parse_extensions("*")))
+        self.assertIsNone(script.compile_extension_pattern(script.parse_extensions(" , ")))
+
+
+if __name__ == "__main__":
+    unittest.main()